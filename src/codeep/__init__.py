@@ -2,7 +2,20 @@
 
 from .client import CodeepClient
 from .llm import CodeepLLM
+from .breaker import CircuitBreaker, CircuitBreakers
+from .analytics import TaskHistoryFrame, load_task_history
+from .bulk import BulkResult, RateLimiter
+from .cache import ResponseCache
+from .cancellation import CancellationToken, Deadline
 from .config import Config
+from .hedging import HedgePolicy
+from .dedup import NearDuplicateCache
+from .journal import TaskJournal
+from .mapreduce import CodeepMapReduce
+from .pool import CodeepClientPool
+from .results import MappedResults, map_results
+from .routing import EndpointRouter
+from .session import CodeepSession
 from .exceptions import (
     CodeepException,
     AuthenticationError,
@@ -10,6 +23,7 @@ from .exceptions import (
     QuotaExceededError,
     TaskError,
     TaskTimeoutError,
+    TaskCancelledError,
     APIError,
     NetworkError,
     ValidationError,
@@ -18,13 +32,32 @@ from .exceptions import (
 __all__ = [
     "CodeepClient",
     "CodeepLLM",
+    "CodeepClientPool",
+    "CodeepMapReduce",
     "Config",
+    "ResponseCache",
+    "NearDuplicateCache",
+    "EndpointRouter",
+    "HedgePolicy",
+    "CircuitBreaker",
+    "CircuitBreakers",
+    "TaskHistoryFrame",
+    "load_task_history",
+    "BulkResult",
+    "RateLimiter",
+    "CancellationToken",
+    "Deadline",
+    "CodeepSession",
+    "TaskJournal",
+    "MappedResults",
+    "map_results",
     "CodeepException",
     "AuthenticationError",
     "AuthorizationError",
     "QuotaExceededError",
     "TaskError",
     "TaskTimeoutError",
+    "TaskCancelledError",
     "APIError",
     "NetworkError",
     "ValidationError",
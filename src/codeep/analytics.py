@@ -0,0 +1,248 @@
+"""Columnar task-history analytics with NumPy-vectorized aggregations
+
+Requires NumPy: ``pip install codeep[analytics]``.
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+STATUSES = ("queued", "processing", "completed", "failed", "cancelled")
+UNKNOWN_STATUS = len(STATUSES)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Epoch value used for missing timestamps (numpy's NaT as int64)
+MISSING_TIME = -(2 ** 63)
+
+BUCKETS = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+
+_OFFSET = re.compile(r"[+-]\d{2}:?\d{2}$")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "Task history analytics require NumPy; install it with "
+            "'pip install codeep[analytics]'"
+        )
+
+
+def _normalize_timestamp(value: Optional[str]) -> str:
+    """Turn an ISO 8601 string into a naive UTC string numpy can parse"""
+    if not value:
+        return "NaT"
+    if value.endswith("Z"):
+        return value[:-1]
+    if "T" in value and _OFFSET.search(value):
+        parsed = datetime.fromisoformat(value).astimezone(timezone.utc)
+        return parsed.replace(tzinfo=None).isoformat()
+    return value
+
+
+def _to_epoch(values: Sequence[Optional[str]]) -> "np.ndarray":
+    """Convert ISO 8601 strings to int64 epoch seconds, MISSING_TIME for gaps"""
+    normalized = [_normalize_timestamp(v) for v in values]
+    return (
+        np.array(normalized, dtype="datetime64[us]")
+        .astype("datetime64[s]")
+        .astype(np.int64)
+    )
+
+
+class TaskHistoryFrame:
+    """Task history stored as parallel NumPy column arrays
+
+    Columns: ``status`` (int8 codes into STATUSES, UNKNOWN_STATUS otherwise),
+    ``created_at``/``started_at``/``completed_at`` (int64 epoch seconds,
+    MISSING_TIME when absent) and ``prompt_length`` (int64 characters).
+    Aggregations are vectorized with ``bincount``/``unique`` so reports over
+    millions of tasks avoid Python-level loops.
+    """
+
+    def __init__(
+        self,
+        status: "np.ndarray",
+        created_at: "np.ndarray",
+        started_at: "np.ndarray",
+        completed_at: "np.ndarray",
+        prompt_length: "np.ndarray",
+        task_id: Optional["np.ndarray"] = None,
+    ):
+        _require_numpy()
+        self.status = status
+        self.created_at = created_at
+        self.started_at = started_at
+        self.completed_at = completed_at
+        self.prompt_length = prompt_length
+        self.task_id = task_id
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "TaskHistoryFrame":
+        """Build a frame from task dicts as returned by ``get_task_history``"""
+        _require_numpy()
+        task_ids: List[Optional[str]] = []
+        statuses: List[int] = []
+        created: List[Optional[str]] = []
+        started: List[Optional[str]] = []
+        completed: List[Optional[str]] = []
+        lengths: List[int] = []
+        for record in records:
+            task_ids.append(record.get("task_id"))
+            statuses.append(STATUS_CODES.get(record.get("status") or "", UNKNOWN_STATUS))
+            created.append(record.get("created_at"))
+            started.append(record.get("started_at"))
+            completed.append(record.get("completed_at"))
+            lengths.append(len(record.get("prompt") or ""))
+        return cls(
+            status=np.array(statuses, dtype=np.int8),
+            created_at=_to_epoch(created),
+            started_at=_to_epoch(started),
+            completed_at=_to_epoch(completed),
+            prompt_length=np.array(lengths, dtype=np.int64),
+            task_id=np.array(task_ids, dtype=object),
+        )
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @property
+    def duration(self) -> "np.ndarray":
+        """Run time in seconds (completed - started), NaN when unknown"""
+        return self._interval(self.started_at, self.completed_at)
+
+    @property
+    def queue_time(self) -> "np.ndarray":
+        """Time spent queued in seconds (started - created), NaN when unknown"""
+        return self._interval(self.created_at, self.started_at)
+
+    @staticmethod
+    def _interval(start: "np.ndarray", end: "np.ndarray") -> "np.ndarray":
+        valid = (start != MISSING_TIME) & (end != MISSING_TIME)
+        out = np.full(len(start), np.nan)
+        out[valid] = (end[valid] - start[valid]).astype(np.float64)
+        return out
+
+    def _column(self, column: Union[str, "np.ndarray"]) -> "np.ndarray":
+        if isinstance(column, str):
+            return np.asarray(getattr(self, column), dtype=np.float64)
+        return np.asarray(column, dtype=np.float64)
+
+    def status_counts(self) -> Dict[str, int]:
+        """Count tasks per status"""
+        counts = np.bincount(self.status, minlength=UNKNOWN_STATUS + 1)
+        return {name: int(counts[code]) for code, name in enumerate(STATUSES + ("unknown",))}
+
+    def group_by_status(self, column: Union[str, "np.ndarray"] = "duration") -> Dict[str, Dict]:
+        """Get count, mean, min and max of a numeric column per status, ignoring NaN"""
+        values = self._column(column)
+        valid = ~np.isnan(values)
+        codes = self.status[valid].astype(np.intp)
+        values = values[valid]
+        size = UNKNOWN_STATUS + 1
+        counts = np.bincount(codes, minlength=size)
+        sums = np.bincount(codes, weights=values, minlength=size)
+        mins = np.full(size, np.inf)
+        maxs = np.full(size, -np.inf)
+        np.minimum.at(mins, codes, values)
+        np.maximum.at(maxs, codes, values)
+
+        report = {}
+        for code, name in enumerate(STATUSES + ("unknown",)):
+            if counts[code] == 0:
+                continue
+            report[name] = {
+                "count": int(counts[code]),
+                "mean": float(sums[code] / counts[code]),
+                "min": float(mins[code]),
+                "max": float(maxs[code]),
+            }
+        return report
+
+    def percentiles(
+        self,
+        column: Union[str, "np.ndarray"] = "duration",
+        q: Sequence[float] = (50, 90, 99),
+    ) -> Dict[float, float]:
+        """Get percentiles of a numeric column, ignoring NaN"""
+        values = self._column(column)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return {p: float("nan") for p in q}
+        return {p: float(v) for p, v in zip(q, np.percentile(values, q))}
+
+    def time_buckets(
+        self,
+        bucket: Union[str, int] = "day",
+        column: Optional[Union[str, "np.ndarray"]] = None,
+    ) -> Dict[str, "np.ndarray"]:
+        """Bucket tasks by ``created_at`` and count them per status
+
+        ``bucket`` is ``"minute"``, ``"hour"``, ``"day"``, ``"week"`` or a
+        width in seconds. Returns ``bucket_start`` (epoch seconds), ``total``
+        and one count array per status; with ``column`` set, the per-bucket
+        NaN-ignoring ``mean`` of that column is included too.
+        """
+        width = BUCKETS[bucket] if isinstance(bucket, str) else int(bucket)
+        has_time = self.created_at != MISSING_TIME
+        starts = (self.created_at[has_time] // width) * width
+        keys, inverse = np.unique(starts, return_inverse=True)
+        inverse = inverse.ravel()
+        size = UNKNOWN_STATUS + 1
+
+        # One bincount over (bucket, status) pairs gives the full count matrix
+        flat = inverse * size + self.status[has_time].astype(np.intp)
+        matrix = np.bincount(flat, minlength=len(keys) * size).reshape(len(keys), size)
+
+        result = {"bucket_start": keys, "total": matrix.sum(axis=1)}
+        for code, name in enumerate(STATUSES):
+            result[name] = matrix[:, code]
+
+        if column is not None:
+            values = self._column(column)[has_time]
+            valid = ~np.isnan(values)
+            counts = np.bincount(inverse[valid], minlength=len(keys))
+            sums = np.bincount(inverse[valid], weights=values[valid], minlength=len(keys))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                result["mean"] = sums / counts
+        return result
+
+    def filter(self, mask: "np.ndarray") -> "TaskHistoryFrame":
+        """Get a new frame with only the rows where ``mask`` is true"""
+        return TaskHistoryFrame(
+            status=self.status[mask],
+            created_at=self.created_at[mask],
+            started_at=self.started_at[mask],
+            completed_at=self.completed_at[mask],
+            prompt_length=self.prompt_length[mask],
+            task_id=self.task_id[mask] if self.task_id is not None else None,
+        )
+
+
+def load_task_history(
+    client,
+    status: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    per_page: int = 100,
+    max_pages: Optional[int] = None,
+) -> TaskHistoryFrame:
+    """Page through ``client.get_task_history`` into a TaskHistoryFrame"""
+    _require_numpy()
+    records: List[Dict] = []
+    page = 1
+    while max_pages is None or page <= max_pages:
+        data = client.get_task_history(
+            page=page, per_page=per_page, status=status, from_date=from_date, to_date=to_date
+        )
+        tasks = data.get("tasks") or []
+        records.extend(tasks)
+        pages = (data.get("pagination") or {}).get("pages")
+        if not tasks or (pages is not None and page >= pages):
+            break
+        page += 1
+    return TaskHistoryFrame.from_records(records)
@@ -26,9 +26,9 @@ class User(BaseModel):
 class AuthClient:
     """Client for authentication endpoints"""
 
-    def __init__(self, base_url: Optional[str] = None):
+    def __init__(self, base_url: Optional[str] = None, session: Optional[requests.Session] = None):
         self.base_url = (base_url or Config.get_base_url()).rstrip("/")
-        self.session = requests.Session()
+        self.session = session or requests.Session()
 
     def register(self, username: str, email: str, password: str) -> Dict:
         """Register a new user"""
@@ -0,0 +1,153 @@
+"""Circuit breakers for the auth and task endpoint classes"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .exceptions import NetworkError
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Endpoint class -> path prefix relative to the API base URL
+DEFAULT_ENDPOINT_CLASSES = {"auth": "/auth", "tasks": "/tasks"}
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker for one endpoint class
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast with NetworkError. Once ``recovery_timeout`` has passed,
+    the next caller runs ``probe`` (a health check); if it passes, a single
+    trial call is let through in the half-open state and its outcome closes
+    or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        probe: Optional[Callable[[], bool]] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe = probe
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self) -> None:
+        """Raise NetworkError if the circuit does not allow a call right now"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._trial_in_flight:
+                raise self._open_error()
+            if self._state == HALF_OPEN:
+                self._trial_in_flight = True
+                return
+            opened_at = self._opened_at or 0.0
+            if time.monotonic() - opened_at < self.recovery_timeout:
+                raise self._open_error()
+            # Claim the recovery probe so concurrent callers keep failing fast
+            self._trial_in_flight = True
+
+        healthy = True
+        if self.probe is not None:
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+
+        with self._lock:
+            if not healthy:
+                self._trial_in_flight = False
+                self._opened_at = time.monotonic()
+                raise self._open_error()
+            self._state = HALF_OPEN
+            logger.info("Circuit for %s endpoints half-open", self.name)
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the circuit if it was half-open"""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("Circuit for %s endpoints closed", self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit past the threshold"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit for %s endpoints opened", self.name)
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """End a call without recording an outcome, freeing a half-open trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self) -> None:
+        """Force the circuit closed"""
+        self.record_success()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "failures": self._failures,
+                "opened_at": self._opened_at,
+            }
+
+    def _open_error(self) -> NetworkError:
+        return NetworkError(f"Circuit open for {self.name} endpoints; failing fast", 503)
+
+
+class CircuitBreakers:
+    """Per-endpoint-class circuit breakers keyed by API path prefix"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        endpoint_classes: Optional[Dict[str, str]] = None,
+    ):
+        self.endpoint_classes = dict(endpoint_classes or DEFAULT_ENDPOINT_CLASSES)
+        self.breakers = {
+            name: CircuitBreaker(name, failure_threshold, recovery_timeout)
+            for name in self.endpoint_classes
+        }
+
+    def set_probe(self, probe: Callable[[], bool]) -> None:
+        """Set the health check used to probe recovery"""
+        for breaker in self.breakers.values():
+            breaker.probe = probe
+
+    def for_path(self, path: str) -> Optional[CircuitBreaker]:
+        """Get the breaker guarding an API path, if any"""
+        for name, prefix in self.endpoint_classes.items():
+            if path.startswith(prefix):
+                return self.breakers[name]
+        return None
+
+    def status(self) -> Dict[str, Dict]:
+        """Get the state of every breaker"""
+        return {name: breaker.status() for name, breaker in self.breakers.items()}
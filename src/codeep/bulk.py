@@ -0,0 +1,115 @@
+"""Concurrent bulk operations over many task IDs"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import requests
+from pydantic import BaseModel
+
+from .exceptions import ValidationError
+
+# "All other endpoints: 100 requests per minute per user"
+DEFAULT_RATE_LIMIT = 100.0
+
+
+class BulkResult(BaseModel):
+    task_id: str
+    ok: bool
+    value: Optional[Any] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+
+ProgressCallback = Callable[[int, int, BulkResult], None]
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads, in requests per minute"""
+
+    def __init__(self, per_minute: float, burst: Optional[int] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, int(per_minute // 10)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _retry_after(response: Optional[requests.Response], attempt: int) -> float:
+    """Get the delay before retrying a 429, honouring Retry-After when present"""
+    if response is not None:
+        try:
+            return float(response.headers.get("Retry-After", ""))
+        except (TypeError, ValueError):
+            pass
+    return min(60.0, 2.0 ** attempt)
+
+
+def run_bulk(
+    operation: Callable[[str, Any], Any],
+    items: Iterable[Tuple[str, Any]],
+    max_workers: int = 8,
+    limiter: Optional[RateLimiter] = None,
+    progress: Optional[ProgressCallback] = None,
+    max_retries: int = 3,
+) -> Dict[str, BulkResult]:
+    """Apply ``operation(task_id, arg)`` to every item with bounded concurrency
+
+    Every attempt, retries included, takes a token from ``limiter``; pass the
+    same limiter to concurrent calls so together they stay within the limit.
+    Individual failures are captured in the returned BulkResult rather than
+    raised, and 429 responses are retried after backing off.
+    """
+    if max_retries < 0:
+        raise ValidationError("max_retries must not be negative")
+    items = list(dict(items).items())
+
+    def attempt(task_id: str, arg: Any) -> BulkResult:
+        retry = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                return BulkResult(task_id=task_id, ok=True, value=operation(task_id, arg))
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status == 429 and retry < max_retries:
+                    time.sleep(_retry_after(e.response, retry))
+                    retry += 1
+                    continue
+                return BulkResult(task_id=task_id, ok=False, error=str(e), status_code=status)
+            except Exception as e:
+                # Keep going past individual failures; the caller sees them per ID
+                return BulkResult(
+                    task_id=task_id,
+                    ok=False,
+                    error=str(e),
+                    status_code=getattr(e, "status_code", None),
+                )
+
+    results: Dict[str, BulkResult] = {}
+    if not items:
+        return results
+    workers = max(1, min(max_workers, len(items)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="codeep-bulk") as executor:
+        futures = [executor.submit(attempt, task_id, arg) for task_id, arg in items]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results[result.task_id] = result
+            if progress is not None:
+                progress(done, len(items), result)
+    return results
@@ -0,0 +1,157 @@
+"""TTL and conditional-request cache for read-mostly endpoints"""
+
+import copy
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Keys that writes such as create_task/delete_task make stale
+TASK_WRITE_KEYS = ("quota", "queue_status", "dashboard_stats", "usage_analytics")
+
+
+class _Entry:
+    __slots__ = ("data", "etag", "last_modified", "expires_at")
+
+    def __init__(self, data: Any, etag: Optional[str], last_modified: Optional[str], expires_at: float):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """Per-endpoint TTL cache with ETag/Last-Modified revalidation
+
+    Fresh entries are served without a round trip. Once an entry expires it
+    is revalidated with ``If-None-Match``/``If-Modified-Since`` so an
+    unchanged resource costs a 304 rather than a full body. Within the
+    ``stale_while_revalidate`` window the stale value is returned immediately
+    and refreshed in a background thread.
+    """
+
+    DEFAULT_TTLS: Dict[str, float] = {
+        "dashboard_stats": 30.0,
+        "usage_analytics": 300.0,
+        "queue_status": 5.0,
+        "health": 10.0,
+        "quota": 30.0,
+        "current_user": 300.0,
+    }
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        stale_while_revalidate: float = 0.0,
+    ):
+        self.ttls = dict(self.DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "stale_served": 0}
+        self._entries: Dict[Tuple, _Entry] = {}
+        self._refreshing: set = set()
+        # Bumped on invalidation so in-flight refreshes don't resurrect entries
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def fetch(
+        self,
+        key: str,
+        session: requests.Session,
+        url: str,
+        params: Optional[Dict] = None,
+    ) -> Any:
+        """Get the JSON body for ``url``, serving from cache when possible"""
+        cache_key = (key, url, tuple(sorted((params or {}).items())))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and now < entry.expires_at:
+                self.stats["hits"] += 1
+                return copy.deepcopy(entry.data)
+            if (
+                entry is not None
+                and now < entry.expires_at + self.stale_while_revalidate
+            ):
+                self.stats["stale_served"] += 1
+                if cache_key not in self._refreshing:
+                    self._refreshing.add(cache_key)
+                    threading.Thread(
+                        target=self._background_refresh,
+                        args=(cache_key, session, url, params),
+                        daemon=True,
+                    ).start()
+                return copy.deepcopy(entry.data)
+            self.stats["misses"] += 1
+
+        return copy.deepcopy(self._refresh(cache_key, session, url, params, entry))
+
+    def _background_refresh(self, cache_key: Tuple, session: requests.Session, url: str, params: Optional[Dict]):
+        try:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+            self._refresh(cache_key, session, url, params, entry)
+        except Exception:
+            logger.warning("Background refresh of %s failed", url, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(cache_key)
+
+    def _refresh(
+        self,
+        cache_key: Tuple,
+        session: requests.Session,
+        url: str,
+        params: Optional[Dict],
+        entry: Optional[_Entry],
+    ) -> Any:
+        """Fetch ``url`` with conditional headers and store the result"""
+        with self._lock:
+            generation = self._generation
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        response = session.get(url, params=params, headers=headers or None)
+        ttl = self.ttls.get(cache_key[0], 0.0)
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                self.stats["not_modified"] += 1
+                entry.expires_at = time.time() + ttl
+                if generation == self._generation:
+                    self._entries[cache_key] = entry
+            return entry.data
+
+        response.raise_for_status()
+        data = response.json()
+        new_entry = _Entry(
+            data,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            time.time() + ttl,
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._entries[cache_key] = new_entry
+        return data
+
+    def invalidate(self, *keys: str) -> None:
+        """Drop cached entries for the given endpoint keys"""
+        with self._lock:
+            self._generation += 1
+            for cache_key in [k for k in self._entries if k[0] in keys]:
+                del self._entries[cache_key]
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
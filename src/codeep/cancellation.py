@@ -0,0 +1,71 @@
+"""Cancellation tokens and deadlines for long-running waits"""
+
+import threading
+import time
+from typing import Optional, overload
+
+from .exceptions import TaskCancelledError
+
+
+class CancellationToken:
+    """Thread-safe flag a caller sets to abandon an in-progress wait"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        """Request cancellation"""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep up to ``timeout`` seconds, returning early (True) if cancelled"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self, message: str = "Operation cancelled") -> None:
+        if self._event.is_set():
+            raise TaskCancelledError(message)
+
+
+class Deadline:
+    """Absolute point in time that bounds a wait and every request inside it"""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Get the seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def request_timeout(self, cap: Optional[float] = None) -> float:
+        """Get a requests timeout that will not outlive the deadline"""
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(remaining, cap)
+        # requests treats 0 as "no time at all"; keep a tiny floor so the
+        # call fails with a timeout rather than a ValueError
+        return max(remaining, 0.001)
+
+    @overload
+    @classmethod
+    def earliest(cls, first: "Deadline", *deadlines: Optional["Deadline"]) -> "Deadline": ...
+
+    @overload
+    @classmethod
+    def earliest(cls, *deadlines: Optional["Deadline"]) -> Optional["Deadline"]: ...
+
+    @classmethod
+    def earliest(cls, *deadlines):
+        """Get the deadline that expires first, ignoring None"""
+        present = [d for d in deadlines if d is not None]
+        if not present:
+            return None
+        return min(present, key=lambda d: d.expires_at)
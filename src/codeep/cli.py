@@ -0,0 +1,252 @@
+"""Command line interface for bulk task submission"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+import requests
+
+from .client import CodeepClient
+from .exceptions import CodeepException
+
+TOKEN_ENV_VAR = "CODEEP_API_TOKEN"
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def read_prompts(stream: TextIO) -> Iterator[Dict]:
+    """Read prompt records from JSONL, accepting bare text lines as prompts"""
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = line
+        if not isinstance(record, dict):
+            record = {"prompt": str(record)}
+        if "prompt" not in record:
+            raise ValueError(f"Line {line_no} has no 'prompt' field")
+        record.setdefault("id", str(line_no))
+        record["id"] = str(record["id"])
+        yield record
+
+
+def load_checkpoint(path: str) -> Tuple[Set[str], Dict[str, str]]:
+    """Get IDs already completed and task IDs to reattach to from an output file
+
+    The last record for an ID wins. A record with a ``task_id`` but no
+    terminal status belongs to a task that may still be running server-side.
+    """
+    latest: Dict[str, Dict] = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                latest[str(record.get("id"))] = record
+    done = {id_ for id_, record in latest.items() if record.get("status") == "completed"}
+    unfinished = {
+        id_: record["task_id"]
+        for id_, record in latest.items()
+        if record.get("task_id") and record.get("status") not in TERMINAL_STATUSES
+    }
+    return done, unfinished
+
+
+class RunStats:
+    """Thread-safe throughput and latency counters for a bulk run"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.latencies: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, latency: float):
+        with self._lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.latencies.append(latency)
+
+    def summary(self) -> str:
+        with self._lock:
+            finished = self.completed + self.failed
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            ordered = sorted(self.latencies)
+        p50 = _percentile(ordered, 50)
+        p95 = _percentile(ordered, 95)
+        return (
+            f"completed={self.completed} failed={self.failed} skipped={self.skipped} "
+            f"rate={finished / elapsed:.2f}/s p50={p50:.1f}s p95={p95:.1f}s"
+        )
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+def run_one(
+    client: CodeepClient,
+    record: Dict,
+    args: argparse.Namespace,
+    task_id: Optional[str] = None,
+    checkpoint: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """Submit one prompt (or reattach to its earlier task), wait, and build its output record
+
+    ``checkpoint`` is called with a pending record as soon as a new task is
+    created, so a run that dies mid-wait reattaches instead of resubmitting.
+    """
+    start = time.monotonic()
+    output = {"id": record["id"], "task_id": None, "status": "failed", "result": None, "error": None}
+    try:
+        task = None
+        if task_id is not None:
+            output["task_id"] = task_id
+            task = _reattach(client, task_id, args)
+        if task is None:
+            # No earlier task, or it no longer exists: submit a fresh one
+            output["task_id"] = None
+            created = client.create_task(record["prompt"], record.get("toolset") or args.toolset)
+            output["task_id"] = created.task_id
+            if checkpoint is not None:
+                checkpoint({"id": record["id"], "task_id": created.task_id, "status": "pending"})
+            task = client.wait_for_completion(
+                created.task_id, timeout=args.timeout, poll_interval=args.poll_interval
+            )
+        output["status"] = task.status
+        output["result"] = task.result
+        output["error"] = task.error_message
+    except Exception as e:
+        if output["task_id"] is not None:
+            # The task may still be running server-side; a rerun reattaches to it
+            output["status"] = "pending"
+        # One bad record must not stop the run; report it in the output instead
+        output["error"] = str(e) if isinstance(e, CodeepException) else f"{type(e).__name__}: {e}"
+    output["latency"] = round(time.monotonic() - start, 3)
+    return output
+
+
+def _reattach(client: CodeepClient, task_id: str, args: argparse.Namespace):
+    """Wait on a task from an earlier run, or get None if it no longer exists"""
+    try:
+        return client.wait_for_completion(
+            task_id, timeout=args.timeout, poll_interval=args.poll_interval
+        )
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None
+        raise
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    """Run prompts from a JSONL file or stdin with bounded concurrency"""
+    token = args.token or os.getenv(TOKEN_ENV_VAR)
+    if not token:
+        print(f"error: pass --token or set {TOKEN_ENV_VAR}", file=sys.stderr)
+        return 2
+
+    client = CodeepClient(args.base_url)
+    client.set_token(token)
+
+    done, unfinished = load_checkpoint(args.output) if not args.no_resume else (set(), {})
+    stats = RunStats()
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+
+    try:
+        with open(args.output, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            pending: Set[Future] = set()
+            last_report = time.monotonic()
+            out_lock = threading.Lock()
+
+            def write(output: Dict):
+                with out_lock:
+                    out.write(json.dumps(output) + "\n")
+                    out.flush()
+
+            def drain():
+                nonlocal pending, last_report
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    output = future.result()
+                    write(output)
+                    stats.record(output["status"] == "completed", output["latency"])
+                if not args.quiet and time.monotonic() - last_report >= args.stats_interval:
+                    print(stats.summary(), file=sys.stderr)
+                    last_report = time.monotonic()
+
+            try:
+                for record in read_prompts(source):
+                    if record["id"] in done:
+                        stats.skipped += 1
+                        continue
+                    # Keep a small backlog so input is read lazily
+                    while len(pending) >= args.concurrency * 2:
+                        drain()
+                    pending.add(executor.submit(
+                        run_one, client, record, args, unfinished.get(record["id"]), write
+                    ))
+            finally:
+                # Record tasks already in flight even if the input turns out bad
+                while pending:
+                    drain()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    if not args.quiet:
+        print(stats.summary(), file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="codeep", description="Codeep AI command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Run prompts from a JSONL file or stdin")
+    run.add_argument("input", nargs="?", default="-", help="JSONL file of prompts ('-' for stdin)")
+    run.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    run.add_argument("-c", "--concurrency", type=int, default=4, help="Tasks in flight at once")
+    run.add_argument("--token", help=f"API token (defaults to ${TOKEN_ENV_VAR})")
+    run.add_argument("--base-url", help="API base URL")
+    run.add_argument("--toolset", type=lambda s: s.split(","), help="Comma separated default toolset")
+    run.add_argument("--timeout", type=int, default=300, help="Per-task timeout in seconds")
+    run.add_argument("--poll-interval", type=int, default=5, help="Seconds between status polls")
+    run.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Do not skip completed IDs or reattach to unfinished tasks",
+    )
+    run.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between stats lines")
+    run.add_argument("-q", "--quiet", action="store_true", help="Do not print stats")
+    run.set_defaults(func=cmd_run)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the ``codeep`` console script"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
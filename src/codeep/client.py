@@ -1,24 +1,102 @@
 """Main client for Codeep AI API"""
 
 from typing import Dict, List, Optional
+from .analytics import TaskHistoryFrame, load_task_history
 from .auth import AuthClient, User
 from .tasks import TaskClient, Task
 from .llm import CodeepLLM
+from .breaker import CircuitBreakers
+from .bulk import DEFAULT_RATE_LIMIT, BulkResult, ProgressCallback, RateLimiter
+from .cache import TASK_WRITE_KEYS, ResponseCache
+from .cancellation import CancellationToken, Deadline
 from .config import Config
+from .hedging import HedgePolicy
+from .journal import TaskJournal
+from .results import DEFAULT_CHUNK_SIZE, Destination
+from .routing import EndpointRouter
+from .session import CodeepSession
 
 
 class CodeepClient:
     """Main client for Codeep AI API"""
 
-    def __init__(self, base_url: Optional[str] = None):
-        self.base_url = base_url or Config.get_base_url()
-        self.auth = AuthClient(self.base_url)
-        self.tasks = TaskClient(self.base_url, session=self.auth.session)
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        journal: Optional[TaskJournal] = None,
+        cache: Optional[ResponseCache] = None,
+        base_urls: Optional[List[str]] = None,
+        probe_interval: Optional[float] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        circuit_breakers: Optional[CircuitBreakers] = None,
+        rate_limit: Optional[float] = DEFAULT_RATE_LIMIT,
+    ):
+        if base_urls is None and base_url is None and len(Config.get_base_urls()) > 1:
+            base_urls = Config.get_base_urls()
+        self.router: Optional[EndpointRouter] = None
+        if base_urls:
+            self.router = EndpointRouter(base_urls)
+            base_url = base_url or self.router.endpoints[0]
+            if probe_interval:
+                self.router.start_probing(probe_interval)
+        self.base_url = (base_url or Config.get_base_url()).rstrip("/")
+        self.session = CodeepSession(
+            self.base_url,
+            router=self.router,
+            hedge_policy=hedge_policy,
+            circuit_breakers=circuit_breakers,
+        )
+        self.auth = AuthClient(self.base_url, session=self.session)
+        self.tasks = TaskClient(
+            self.base_url, session=self.auth.session, journal=journal, rate_limit=rate_limit
+        )
+        self.cache = cache
         self._llm: Optional[CodeepLLM] = None
 
+    def set_endpoints(self, base_urls: List[str]):
+        """Reconfigure the base URLs requests are routed across"""
+        if self.router is None:
+            self.router = EndpointRouter(base_urls)
+            self.session.router = self.router
+        else:
+            self.router.set_endpoints(base_urls)
+
+    def endpoint_status(self) -> List[Dict]:
+        """Get health and latency for each routed endpoint"""
+        if self.router is None:
+            return []
+        return self.router.status()
+
+    def hedge_stats(self) -> Dict:
+        """Get how often hedged requests fired and won"""
+        if self.session.hedge_policy is None:
+            return {}
+        return self.session.hedge_policy.stats()
+
+    def circuit_status(self) -> Dict[str, Dict]:
+        """Get the circuit breaker state for each endpoint class"""
+        if self.session.circuit_breakers is None:
+            return {}
+        return self.session.circuit_breakers.status()
+
+    def _cached_get(self, key: str, url: str, params: Optional[Dict] = None) -> Dict:
+        """GET a read-mostly endpoint through the response cache if enabled"""
+        if self.cache is not None:
+            return self.cache.fetch(key, self.auth.session, url, params)
+        response = self.auth.session.get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def _invalidate(self, *keys: str):
+        if self.cache is not None:
+            self.cache.invalidate(*keys)
+
     def login(self, username: str, password: str) -> Dict:
         """Login and get access token"""
-        return self.auth.login(username, password)
+        data = self.auth.login(username, password)
+        if self.cache is not None:
+            self.cache.clear()
+        return data
 
     def register(self, username: str, email: str, password: str) -> Dict:
         """Register a new user"""
@@ -27,56 +105,157 @@ class CodeepClient:
     def set_token(self, token: str):
         """Manually set authentication token"""
         self.auth.set_token(token)
+        if self.cache is not None:
+            self.cache.clear()
 
     def get_current_user(self) -> User:
         """Get current user information"""
-        return self.auth.get_current_user()
+        if self.cache is None:
+            return self.auth.get_current_user()
+        data = self._cached_get("current_user", f"{self.auth.base_url}/auth/me")
+        return User(**data["user"])
 
     def get_quota(self) -> Dict:
         """Get user quota information"""
-        return self.auth.get_quota()
+        if self.cache is None:
+            return self.auth.get_quota()
+        return self._cached_get("quota", f"{self.auth.base_url}/auth/quota")
 
     def validate_quota(self) -> Dict:
         """Validate if user has remaining quota"""
         return self.auth.validate_quota()
 
-    def create_task(self, prompt: str, toolset: Optional[List[str]] = None) -> Task:
+    def create_task(
+        self,
+        prompt: str,
+        toolset: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Task:
         """Create a new task"""
-        return self.tasks.create_task(prompt, toolset)
+        task = self.tasks.create_task(prompt, toolset, timeout=timeout)
+        self._invalidate(*TASK_WRITE_KEYS)
+        return task
 
     def get_user_tasks(self) -> List[Task]:
         """Get all tasks for the authenticated user"""
         return self.tasks.get_user_tasks()
 
-    def get_task(self, task_id: str) -> Task:
+    def get_task(self, task_id: str, timeout: Optional[float] = None) -> Task:
         """Get specific task details"""
-        return self.tasks.get_task(task_id)
+        return self.tasks.get_task(task_id, timeout=timeout)
+
+    def update_task(self, task_id: str, **kwargs) -> Task:
+        """Update task information"""
+        task = self.tasks.update_task(task_id, **kwargs)
+        self._invalidate(*TASK_WRITE_KEYS)
+        return task
+
+    def delete_task(self, task_id: str) -> Dict:
+        """Delete a task"""
+        result = self.tasks.delete_task(task_id)
+        self._invalidate(*TASK_WRITE_KEYS)
+        return result
+
+    def get_tasks(
+        self,
+        task_ids: List[str],
+        max_workers: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, BulkResult]:
+        """Fetch many tasks concurrently, returning a per-ID outcome"""
+        return self.tasks.get_tasks(task_ids, max_workers, rate_limiter, progress)
+
+    def bulk_update_tasks(
+        self,
+        updates: Dict[str, Dict],
+        max_workers: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, BulkResult]:
+        """Update many tasks concurrently from a ``{task_id: fields}`` mapping"""
+        results = self.tasks.bulk_update_tasks(updates, max_workers, rate_limiter, progress)
+        self._invalidate(*TASK_WRITE_KEYS)
+        return results
 
-    def wait_for_completion(self, task_id: str, timeout: int = 300, poll_interval: int = 5) -> Task:
+    def bulk_delete_tasks(
+        self,
+        task_ids: List[str],
+        max_workers: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, BulkResult]:
+        """Delete many tasks concurrently, returning a per-ID outcome"""
+        results = self.tasks.bulk_delete_tasks(task_ids, max_workers, rate_limiter, progress)
+        self._invalidate(*TASK_WRITE_KEYS)
+        return results
+
+    def wait_for_completion(
+        self,
+        task_id: str,
+        timeout: int = 300,
+        poll_interval: int = 5,
+        cancel_token: Optional[CancellationToken] = None,
+        deadline: Optional[Deadline] = None,
+        cancel_remote: Optional[str] = None,
+    ) -> Task:
         """Wait for task completion with polling"""
-        return self.tasks.wait_for_completion(task_id, timeout, poll_interval)
+        return self.tasks.wait_for_completion(
+            task_id,
+            timeout,
+            poll_interval,
+            cancel_token=cancel_token,
+            deadline=deadline,
+            cancel_remote=cancel_remote,
+        )
+
+    def resume_pending(
+        self, timeout: int = 300, poll_interval: int = 5, max_workers: int = 8
+    ) -> Dict[str, Task]:
+        """Reattach to unfinished journaled tasks and wait for them concurrently"""
+        return self.tasks.resume_pending(timeout, poll_interval, max_workers)
 
     def get_task_results(self, task_id: str) -> Dict:
         """Get detailed results for a completed task"""
         return self.tasks.get_task_results(task_id)
 
+    def download_task_results(
+        self,
+        task_id: str,
+        destination: Destination,
+        artifact: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checksum: Optional[str] = None,
+        expected_digest: Optional[str] = None,
+    ) -> Dict:
+        """Stream task results to a file path or writable without buffering"""
+        return self.tasks.download_task_results(
+            task_id,
+            destination,
+            artifact=artifact,
+            chunk_size=chunk_size,
+            checksum=checksum,
+            expected_digest=expected_digest,
+        )
+
     def get_queue_status(self) -> Dict:
         """Get current queue statistics"""
-        return self.tasks.get_queue_status()
+        if self.cache is None:
+            return self.tasks.get_queue_status()
+        return self._cached_get("queue_status", f"{self.tasks.base_url}/tasks/queue/status")
 
     @property
     def llm(self) -> CodeepLLM:
         """Get LangChain compatible LLM instance"""
         if self._llm is None:
-            self._llm = CodeepLLM(client=self.tasks)
+            # Built on the client, not self.tasks, so task writes invalidate the cache
+            self._llm = CodeepLLM(client=self)
         return self._llm
 
     def get_dashboard_stats(self) -> Dict:
         """Get dashboard statistics (requires auth)"""
         url = f"{self.base_url}/dashboard/stats"
-        response = self.auth.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._cached_get("dashboard_stats", url)
 
     def get_task_history(
         self,
@@ -103,17 +282,31 @@ class CodeepClient:
         response.raise_for_status()
         return response.json()
 
+    def get_task_history_frame(
+        self,
+        status: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        per_page: int = 100,
+        max_pages: Optional[int] = None,
+    ) -> TaskHistoryFrame:
+        """Load task history into NumPy columns for local analytics"""
+        return load_task_history(
+            self,
+            status=status,
+            from_date=from_date,
+            to_date=to_date,
+            per_page=per_page,
+            max_pages=max_pages,
+        )
+
     def get_usage_analytics(self, days: int = 30) -> Dict:
         """Get usage analytics"""
         url = f"{self.base_url}/dashboard/usage"
         params = {"days": days}
-        response = self.auth.session.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return self._cached_get("usage_analytics", url, params)
 
     def health_check(self) -> Dict:
         """Check API health status"""
         url = f"{self.base_url}/health"
-        response = self.auth.session.get(url)
-        response.raise_for_status()
-        return response.json()
\ No newline at end of file
+        return self._cached_get("health", url)
\ No newline at end of file
@@ -1,7 +1,7 @@
 """Configuration module for Codeep AI SDK"""
 
 import os
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -13,6 +13,11 @@ class Config:
 
     # API Configuration
     API_BASE_URL: str = os.getenv("CODEEP_API_BASE_URL", "https://api.codeep.cc/v1")
+    API_BASE_URLS: List[str] = [
+        url.strip().rstrip("/")
+        for url in os.getenv("CODEEP_API_BASE_URLS", "").split(",")
+        if url.strip()
+    ]
     ENVIRONMENT: str = os.getenv("CODEEP_ENVIRONMENT", "production")
 
     @classmethod
@@ -20,6 +25,16 @@ class Config:
         """Get the API base URL"""
         return cls.API_BASE_URL
 
+    @classmethod
+    def get_base_urls(cls) -> List[str]:
+        """Get all configured API base URLs (regions or replicas)"""
+        return list(cls.API_BASE_URLS) or [cls.API_BASE_URL]
+
+    @classmethod
+    def set_base_urls(cls, urls: List[str]):
+        """Set several API base URLs for failover and latency-based routing"""
+        cls.API_BASE_URLS = [url.rstrip("/") for url in urls]
+
     @classmethod
     def is_development(cls) -> bool:
         """Check if running in development environment"""
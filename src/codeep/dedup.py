@@ -0,0 +1,227 @@
+"""Near-duplicate prompt cache using MinHash signatures and LSH"""
+
+import hashlib
+import logging
+import random
+import re
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Small enough that a * h + b fits in uint64 for 32-bit shingle hashes, so the
+# NumPy and pure-Python signatures are identical
+_MERSENNE_PRIME = (1 << 31) - 1
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+# Shingle hashes per NumPy block, bounding the num_perm x block temporary
+_NUMPY_BLOCK = 4096
+# Signatures of recent misses kept for the store() that usually follows
+_MISS_SIGNATURES = 256
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Tokenize into words and punctuation joined by single spaces
+
+    Whitespace differences disappear, while case and punctuation are kept
+    because they are significant in code.
+    """
+    return " ".join(_TOKEN.findall(prompt))
+
+
+class _Entry:
+    __slots__ = ("key", "signature", "result", "latency", "band_keys")
+
+    def __init__(self, key: str, signature: Tuple[int, ...], result: str, latency: float, band_keys: List[Tuple]):
+        self.key = key
+        self.signature = signature
+        self.result = result
+        self.latency = latency
+        self.band_keys = band_keys
+
+
+class NearDuplicateCache:
+    """Serve cached results for prompts that are nearly identical to earlier ones
+
+    Prompts are normalized, split into word shingles and reduced to a MinHash
+    signature; locality-sensitive hashing over signature bands finds candidate
+    matches without scanning every entry. A candidate is a hit when its
+    estimated Jaccard similarity is at least ``threshold``. Entries are
+    partitioned by ``context`` (e.g. the toolset) so prompts run with
+    different tools never share results.
+
+    Signatures are computed with NumPy when it is installed
+    (``pip install codeep[analytics]``), and a miss's signature is reused by
+    the ``store`` that follows it rather than computed again.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+        max_entries: int = 10000,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        if np is not None:
+            self._a = np.array([a for a, _ in self._perms], dtype=np.uint64)
+            self._b = np.array([b for _, b in self._perms], dtype=np.uint64)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._miss_signatures: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "near_hits": 0,
+            "misses": 0,
+            "tasks_saved": 0,
+            "seconds_saved": 0.0,
+        }
+
+    def _shingles(self, normalized: str) -> Set[bytes]:
+        words = normalized.split()
+        if len(words) < self.shingle_size:
+            return {normalized.encode("utf-8")}
+        k = self.shingle_size
+        return {" ".join(words[i:i + k]).encode("utf-8") for i in range(len(words) - k + 1)}
+
+    def signature(self, prompt: str) -> Tuple[int, ...]:
+        """Get the MinHash signature of a prompt"""
+        hashes = [
+            struct.unpack("<I", hashlib.blake2b(shingle, digest_size=4).digest())[0]
+            for shingle in self._shingles(normalize_prompt(prompt))
+        ]
+        if np is None:
+            return tuple(
+                min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms
+            )
+        values = np.array(hashes, dtype=np.uint64)
+        mins = np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        for start in range(0, len(values), _NUMPY_BLOCK):
+            block = values[start:start + _NUMPY_BLOCK]
+            permuted = (self._a[:, None] * block[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+            np.minimum(mins, permuted.min(axis=1), out=mins)
+        return tuple(int(v) for v in mins)
+
+    def _band_keys(self, signature: Tuple[int, ...], context: Tuple) -> List[Tuple]:
+        r = self.rows
+        return [(context, i, signature[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    @staticmethod
+    def _key(normalized: str, context: Tuple) -> str:
+        return hashlib.sha256(repr((context, normalized)).encode("utf-8")).hexdigest()
+
+    def similarity(self, a: Sequence[int], b: Sequence[int]) -> float:
+        """Estimate Jaccard similarity from two signatures"""
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def lookup(self, prompt: str, context: Optional[Sequence[str]] = None) -> Optional[str]:
+        """Get a cached result for ``prompt`` or a near-duplicate of it"""
+        context = tuple(context or ())
+        normalized = normalize_prompt(prompt)
+        key = self._key(normalized, context)
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._stats["exact_hits"] += 1
+                return self._hit(entry, 1.0)
+
+        signature = self.signature(prompt)
+        with self._lock:
+            candidates: Set[str] = set()
+            for band_key in self._band_keys(signature, context):
+                candidates.update(self._buckets.get(band_key, ()))
+            best, best_score = None, 0.0
+            for candidate in candidates:
+                score = self.similarity(signature, self._entries[candidate].signature)
+                if score > best_score:
+                    best, best_score = self._entries[candidate], score
+            if best is not None and best_score >= self.threshold:
+                self._stats["near_hits"] += 1
+                return self._hit(best, best_score)
+            self._stats["misses"] += 1
+            self._miss_signatures[key] = signature
+            while len(self._miss_signatures) > _MISS_SIGNATURES:
+                self._miss_signatures.popitem(last=False)
+            return None
+
+    def _hit(self, entry: _Entry, score: float) -> str:
+        self._entries.move_to_end(entry.key)
+        self._stats["tasks_saved"] += 1
+        self._stats["seconds_saved"] += entry.latency
+        logger.info(
+            "Prompt cache hit (similarity %.2f): saved 1 task and ~%.1fs",
+            score,
+            entry.latency,
+        )
+        return entry.result
+
+    def store(
+        self,
+        prompt: str,
+        result: str,
+        latency: float = 0.0,
+        context: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Cache the result of a prompt along with how long it took"""
+        context = tuple(context or ())
+        key = self._key(normalize_prompt(prompt), context)
+        with self._lock:
+            signature = self._miss_signatures.pop(key, None)
+        if signature is None:
+            signature = self.signature(prompt)
+        band_keys = self._band_keys(signature, context)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = _Entry(key, signature, result, latency, band_keys)
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str):
+        entry = self._entries.pop(key)
+        for band_key in entry.band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._miss_signatures.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Get hit counts and the quota and latency saved by the cache"""
+        with self._lock:
+            return dict(self._stats)
@@ -37,6 +37,11 @@ class TaskTimeoutError(TaskError):
     pass
 
 
+class TaskCancelledError(TaskError):
+    """Raised when a wait for a task is cancelled by the caller"""
+    pass
+
+
 class APIError(CodeepException):
     """Raised when API returns an error response"""
 
@@ -0,0 +1,97 @@
+"""Request hedging policy for tail-latency reduction on idempotent GETs"""
+
+import re
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Pattern
+
+# get_task and get_task_results
+DEFAULT_HEDGE_PATHS = re.compile(r"/tasks/tasks/[^/]+(/results)?/?$")
+
+
+class HedgePolicy:
+    """Decide when to send a duplicate GET and track how hedges perform
+
+    Once ``min_samples`` latencies have been observed, a request that has not
+    answered within the ``percentile`` of recent latency gets a duplicate, and
+    whichever successful response arrives first wins. Hedges are capped at
+    ``max_extra_load`` times the number of eligible requests.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_extra_load: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        min_delay: float = 0.01,
+        paths: Optional[Pattern] = DEFAULT_HEDGE_PATHS,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.max_extra_load = max_extra_load
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.paths = paths
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._hedges_fired = 0
+        self._hedges_won = 0
+
+    def applies(self, method: str, url: str, kwargs: Dict) -> bool:
+        """Check whether a request is eligible for hedging"""
+        if method.upper() != "GET" or kwargs.get("stream"):
+            return False
+        if self.paths is not None and not self.paths.search(url.split("?", 1)[0]):
+            return False
+        with self._lock:
+            self._requests += 1
+        return True
+
+    def hedge_delay(self) -> Optional[float]:
+        """Get how long to wait before hedging, or None until enough samples exist"""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100.0))
+        return max(self.min_delay, ordered[index])
+
+    def observe(self, latency: float) -> None:
+        """Record the latency of a single attempt"""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def can_hedge(self) -> bool:
+        """Check, without reserving, whether the budget would allow a hedge"""
+        with self._lock:
+            return self._hedges_fired + 1 <= self.max_extra_load * self._requests
+
+    def acquire(self) -> bool:
+        """Reserve a hedge if the extra-load budget allows it"""
+        with self._lock:
+            if self._hedges_fired + 1 > self.max_extra_load * self._requests:
+                return False
+            self._hedges_fired += 1
+            return True
+
+    def record_win(self) -> None:
+        """Record that a hedge answered before the original request"""
+        with self._lock:
+            self._hedges_won += 1
+
+    def stats(self) -> Dict:
+        """Get hedging counters and current delay"""
+        delay = self.hedge_delay()
+        with self._lock:
+            requests, fired, won = self._requests, self._hedges_fired, self._hedges_won
+        return {
+            "requests": requests,
+            "hedges_fired": fired,
+            "hedges_won": won,
+            "hedge_rate": fired / requests if requests else 0.0,
+            "win_rate": won / fired if fired else 0.0,
+            "hedge_delay": delay,
+        }
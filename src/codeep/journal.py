@@ -0,0 +1,106 @@
+"""Append-only local journal of submitted tasks for crash recovery"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+TERMINAL_STATES = frozenset({"completed", "failed", "deleted", "cancelled"})
+
+
+class TaskJournal:
+    """Append-only JSONL journal of task IDs and their state transitions
+
+    Each line records one transition. On restart, ``pending()`` lists tasks
+    that never reached a terminal state so the client can reattach to them.
+    The journal rewrites itself with only unfinished tasks once it has
+    accumulated ``compact_every`` appends, keeping recovery fast.
+    """
+
+    def __init__(self, path: str, compact_every: int = 1000, fsync: bool = False):
+        self.path = os.fspath(path)
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict] = {}
+        self._since_compact = 0
+        self._load()
+
+    def _load(self):
+        """Replay the journal file into memory"""
+        if not os.path.exists(self.path):
+            return
+        torn = False
+        with open(self.path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write is expected
+                    torn = True
+                    continue
+                self._apply(entry)
+                self._since_compact += 1
+        if torn:
+            # Rewrite so new appends don't land on the end of the torn line
+            self._compact_locked()
+
+    def _apply(self, entry: Dict):
+        task_id = entry.get("task_id")
+        if not task_id:
+            return
+        state = self._states.setdefault(task_id, {"task_id": task_id})
+        state.update({k: v for k, v in entry.items() if v is not None})
+
+    def record(self, task_id: str, status: str, **fields) -> None:
+        """Append a state transition for a task"""
+        entry = {"task_id": task_id, "status": status, "ts": time.time(), **fields}
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+                fh.flush()
+                if self.fsync:
+                    os.fsync(fh.fileno())
+            self._apply(entry)
+            self._since_compact += 1
+            if self.compact_every and self._since_compact >= self.compact_every:
+                self._compact_locked()
+
+    def status(self, task_id: str) -> Optional[str]:
+        """Get the last journaled status for a task"""
+        with self._lock:
+            state = self._states.get(task_id)
+            return state.get("status") if state else None
+
+    def pending(self) -> List[str]:
+        """Get IDs of tasks that have not reached a terminal state"""
+        with self._lock:
+            return [
+                task_id
+                for task_id, state in self._states.items()
+                if state.get("status") not in TERMINAL_STATES
+            ]
+
+    def compact(self) -> None:
+        """Rewrite the journal keeping only the latest state of unfinished tasks"""
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        live = {
+            task_id: state
+            for task_id, state in self._states.items()
+            if state.get("status") not in TERMINAL_STATES
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            for state in live.values():
+                fh.write(json.dumps(state, separators=(",", ":")) + "\n")
+            fh.flush()
+            if self.fsync:
+                os.fsync(fh.fileno())
+        os.replace(tmp_path, self.path)
+        self._states = live
+        self._since_compact = 0
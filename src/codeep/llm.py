@@ -1,13 +1,25 @@
 """LangChain compatible LLM implementation for Codeep AI"""
 
+import time
 from typing import Any, Dict, Iterator, List, Optional, Union
 from langchain_core.callbacks.manager import CallbackManagerForLLMRun
 from langchain_core.language_models.llms import LLM
 from langchain_core.outputs import Generation, GenerationChunk, LLMResult
 from pydantic import Field, field_validator
+import requests
 
 from .tasks import TaskClient
-from .exceptions import TaskError
+from .exceptions import TaskCancelledError, TaskError, TaskTimeoutError
+from .cancellation import CancellationToken, Deadline
+from .dedup import NearDuplicateCache
+
+# Errors that end a call early because the caller bounded it
+_STOPPED = (TaskCancelledError, TaskTimeoutError)
+
+
+def _is_bounded(kwargs: Dict[str, Any]) -> bool:
+    """Check whether a call was given a cancel token or deadline"""
+    return kwargs.get("cancel_token") is not None or kwargs.get("deadline") is not None
 
 
 class CodeepLLM(LLM):
@@ -18,6 +30,8 @@ class CodeepLLM(LLM):
     toolset: Optional[List[str]] = Field(default=None)
     timeout: int = Field(default=300)
     poll_interval: int = Field(default=5)
+    cancel_remote: Optional[str] = Field(default=None)
+    prompt_cache: Optional[NearDuplicateCache] = Field(default=None)
 
     @field_validator("client", mode="before")
     @classmethod
@@ -39,16 +53,53 @@ class CodeepLLM(LLM):
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> str:
-        """Call the Codeep AI API"""
-        # Create task
-        task = self.client.create_task(prompt=prompt, toolset=self.toolset)
+        """Call the Codeep AI API
+
+        Pass ``cancel_token`` (CancellationToken) and/or ``deadline`` (Deadline)
+        as keyword arguments to bound the call; they flow into every request
+        the task client makes. A request that runs out of the deadline raises
+        TaskTimeoutError, and no task is created once the deadline has passed.
+        """
+        cancel_token: Optional[CancellationToken] = kwargs.get("cancel_token")
+        deadline: Optional[Deadline] = kwargs.get("deadline")
+        create_kwargs: Dict[str, Any] = {}
+        wait_kwargs: Dict[str, Any] = {}
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+            wait_kwargs["cancel_token"] = cancel_token
+        if deadline is not None:
+            wait_kwargs["deadline"] = deadline
+        if self.cancel_remote:
+            wait_kwargs["cancel_remote"] = self.cancel_remote
+
+        # Serve near-duplicate prompts from the cache
+        if self.prompt_cache is not None:
+            cached = self.prompt_cache.lookup(prompt, context=self.toolset)
+            if cached is not None:
+                return self._apply_stop(cached, stop)
+        start = time.monotonic()
+
+        if deadline is not None:
+            if deadline.expired:
+                # Don't create (and pay for) a task nobody will wait for
+                raise TaskTimeoutError("Deadline passed before the task was created")
+            create_kwargs["timeout"] = deadline.request_timeout()
 
-        # Wait for completion
-        completed_task = self.client.wait_for_completion(
-            task.task_id,
-            timeout=self.timeout,
-            poll_interval=self.poll_interval
-        )
+        try:
+            # Create task
+            task = self.client.create_task(prompt=prompt, toolset=self.toolset, **create_kwargs)
+
+            # Wait for completion
+            completed_task = self.client.wait_for_completion(
+                task.task_id,
+                timeout=self.timeout,
+                poll_interval=self.poll_interval,
+                **wait_kwargs
+            )
+        except requests.Timeout as e:
+            if deadline is None:
+                raise
+            raise TaskTimeoutError(f"Request ran out of time before the deadline: {e}") from e
 
         if completed_task.status == "failed":
             error_msg = completed_task.error_message or "Task failed"
@@ -57,14 +108,34 @@ class CodeepLLM(LLM):
         if completed_task.result is None:
             raise TaskError("Task completed but no result returned")
 
-        # Handle stop sequences
+        if self.prompt_cache is not None:
+            self.prompt_cache.store(
+                prompt,
+                completed_task.result,
+                latency=time.monotonic() - start,
+                context=self.toolset,
+            )
+
+        return self._apply_stop(completed_task.result, stop)
+
+    def complete(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        """Run one prompt like ``invoke``, but raise if the task fails
+
+        ``invoke`` turns a failed task into an empty string. This goes through
+        the same LangChain callbacks and tracing, then re-raises the error
+        instead. Keyword arguments are passed on as for ``invoke``.
+        """
+        result = self.generate([prompt], stop=stop, raise_errors=True, **kwargs)
+        return result.generations[0][0].text
+
+    @staticmethod
+    def _apply_stop(text: str, stop: Optional[List[str]]) -> str:
+        """Truncate text at the first stop sequence found"""
         if stop:
             for stop_seq in stop:
-                if stop_seq in completed_task.result:
-                    completed_task.result = completed_task.result.split(stop_seq)[0]
-                    break
-
-        return completed_task.result
+                if stop_seq in text:
+                    return text.split(stop_seq)[0]
+        return text
 
     @property
     def _identifying_params(self) -> Dict[str, Any]:
@@ -84,12 +155,18 @@ class CodeepLLM(LLM):
         **kwargs: Any,
     ) -> LLMResult:
         """Generate completions for multiple prompts"""
+        raise_errors = kwargs.pop("raise_errors", False)
+        bounded = _is_bounded(kwargs)
         generations = []
         for prompt in prompts:
             try:
                 text = self._call(prompt, stop=stop, run_manager=run_manager, **kwargs)
                 generations.append([Generation(text=text)])
             except Exception as e:
+                # A caller that passed a token or deadline asked to stop (or its
+                # deadline passed); don't mask that
+                if raise_errors or (bounded and isinstance(e, _STOPPED)):
+                    raise
                 # For multiple prompts, we continue with empty generation on error
                 generations.append([Generation(text="")])
 
@@ -108,4 +185,6 @@ class CodeepLLM(LLM):
             text = self._call(prompt, stop=stop, run_manager=run_manager, **kwargs)
             yield GenerationChunk(text=text)
         except Exception as e:
+            if _is_bounded(kwargs) and isinstance(e, _STOPPED):
+                raise
             yield GenerationChunk(text="")
\ No newline at end of file
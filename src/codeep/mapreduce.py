@@ -0,0 +1,124 @@
+"""Parallel map-reduce over large inputs using CodeepLLM"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Optional, Tuple
+
+from .exceptions import ValidationError
+from .llm import CodeepLLM
+
+DEFAULT_MAP_PROMPT = "{chunk}"
+DEFAULT_REDUCE_PROMPT = (
+    "Combine the following partial results into a single coherent answer:\n\n{results}"
+)
+RESULT_SEPARATOR = "\n\n---\n\n"
+
+
+class CodeepMapReduce:
+    """Split a large input into chunks, run them as parallel tasks, and reduce
+
+    Map prompts are built from ``map_prompt`` (``{chunk}``, ``{index}`` and
+    ``{total}`` are available) and submitted with at most ``max_concurrency``
+    tasks in flight. Partial results are combined with ``reduce_prompt``
+    (``{results}``); with ``reduce_fanout`` set they are reduced as a tree,
+    ``reduce_fanout`` results at a time, which keeps each reduce prompt small.
+    A failed map or reduce task raises instead of contributing an empty result.
+    """
+
+    def __init__(
+        self,
+        llm: CodeepLLM,
+        chunk_size: int = 8000,
+        chunk_overlap: int = 200,
+        max_concurrency: int = 4,
+        map_prompt: str = DEFAULT_MAP_PROMPT,
+        reduce_prompt: str = DEFAULT_REDUCE_PROMPT,
+        reduce_fanout: Optional[int] = None,
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValidationError("chunk_overlap must be smaller than chunk_size")
+        if reduce_fanout is not None and reduce_fanout < 2:
+            raise ValidationError("reduce_fanout must be at least 2")
+        self.llm = llm
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.max_concurrency = max_concurrency
+        self.map_prompt = map_prompt
+        self.reduce_prompt = reduce_prompt
+        self.reduce_fanout = reduce_fanout
+
+    def split(self, text: str) -> List[str]:
+        """Split text into overlapping chunks, preferring paragraph and line breaks"""
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = min(start + self.chunk_size, len(text))
+            if end < len(text):
+                # Only look for a break in the back half so chunks stay large
+                floor = start + self.chunk_size // 2
+                for sep in ("\n\n", "\n", " "):
+                    cut = text.rfind(sep, floor, end)
+                    if cut != -1:
+                        end = cut + len(sep)
+                        break
+            chunks.append(text[start:end])
+            if end >= len(text):
+                break
+            start = max(end - self.chunk_overlap, start + 1)
+        return chunks
+
+    def iter_map(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Run the map step, yielding ``(chunk_index, result)`` as tasks finish"""
+        chunks = self.split(text)
+        prompts = [
+            self.map_prompt.format(chunk=chunk, index=i, total=len(chunks))
+            for i, chunk in enumerate(chunks)
+        ]
+        yield from self._run_all(prompts)
+
+    def reduce(self, results: List[str]) -> str:
+        """Combine partial results, as a tree when ``reduce_fanout`` is set"""
+        if not results:
+            return ""
+        while len(results) > 1:
+            fanout = self.reduce_fanout or len(results)
+            groups = [results[i:i + fanout] for i in range(0, len(results), fanout)]
+            # A trailing single result carries over to the next level unchanged
+            reduced = {i: group[0] for i, group in enumerate(groups) if len(group) == 1}
+            pending = [i for i, group in enumerate(groups) if len(group) > 1]
+            prompts = [
+                self.reduce_prompt.format(results=RESULT_SEPARATOR.join(groups[i]))
+                for i in pending
+            ]
+            for index, result in self._run_all(prompts):
+                reduced[pending[index]] = result
+            results = [reduced[i] for i in range(len(groups))]
+        return results[0]
+
+    def run(self, text: str) -> str:
+        """Map over the chunks of ``text`` in parallel and reduce the results"""
+        mapped = {}
+        for index, result in self.iter_map(text):
+            mapped[index] = result
+        ordered = [mapped[i] for i in sorted(mapped)]
+        if len(ordered) == 1:
+            return ordered[0]
+        return self.reduce(ordered)
+
+    def _run_all(self, prompts: List[str]) -> Iterator[Tuple[int, str]]:
+        """Submit prompts with bounded concurrency and yield results as they finish"""
+        if not prompts:
+            return
+        workers = max(1, min(self.max_concurrency, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="codeep-map") as executor:
+            # complete rather than invoke: invoke turns task failures into
+            # empty strings, which would be reduced silently
+            futures = {
+                executor.submit(self.llm.complete, prompt): index
+                for index, prompt in enumerate(prompts)
+            }
+            try:
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
@@ -0,0 +1,278 @@
+"""Pool of authenticated clients that spreads tasks across accounts"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+import requests
+
+from .client import CodeepClient
+from .exceptions import CodeepException, QuotaExceededError, ValidationError
+from .llm import CodeepLLM
+from .tasks import Task
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class _Member:
+    __slots__ = ("client", "remaining", "quota_checked_at", "in_flight", "backoff_until")
+
+    def __init__(self, client: CodeepClient):
+        self.client = client
+        self.remaining: Optional[int] = None
+        self.quota_checked_at = 0.0
+        self.in_flight = 0
+        self.backoff_until = 0.0
+
+
+class CodeepClientPool:
+    """Aggregate quota and throughput across several authenticated clients
+
+    ``create_task`` goes to the account with the most remaining daily quota
+    (``strategy="quota"``) or the fewest tasks in flight
+    (``strategy="in_flight"``). Each task stays pinned to the account that
+    created it until it finishes, so follow-up calls such as ``get_task`` and
+    ``wait_for_completion`` reach the right account; finished tasks are
+    looked up across the accounts again on demand. The pool exposes the
+    TaskClient interface and can back a CodeepLLM.
+
+    The API answers both a spent daily quota and a rate limit with 429, so
+    after a 429 the pool asks the account to validate its quota. An account
+    whose quota is spent is skipped until its quota is re-read after
+    ``quota_refresh`` seconds. Otherwise the 429 is a rate limit: the
+    account is skipped for its Retry-After (or ``rate_limit_backoff``)
+    seconds, and when every account is backing off the pool waits for the
+    first one to come back.
+    """
+
+    STRATEGIES = ("quota", "in_flight")
+
+    def __init__(
+        self,
+        clients: List[CodeepClient],
+        strategy: str = "quota",
+        quota_refresh: float = 60.0,
+        rate_limit_backoff: float = 5.0,
+        max_backoffs: int = 3,
+    ):
+        if strategy not in self.STRATEGIES:
+            raise ValidationError(f"Unknown pool strategy '{strategy}'")
+        self.strategy = strategy
+        self.quota_refresh = quota_refresh
+        self.rate_limit_backoff = rate_limit_backoff
+        self.max_backoffs = max_backoffs
+        self._members: List[_Member] = [_Member(client) for client in clients]
+        self._owners: Dict[str, _Member] = {}
+        self._active: Set[str] = set()
+        self._lock = threading.Lock()
+        self._llm: Optional[CodeepLLM] = None
+
+    def add_client(self, client: CodeepClient) -> None:
+        """Add another authenticated client to the pool"""
+        with self._lock:
+            self._members.append(_Member(client))
+
+    @property
+    def clients(self) -> List[CodeepClient]:
+        return [member.client for member in self._members]
+
+    def _refresh_quota(self, member: _Member):
+        """Refresh a member's remaining quota if the cached value is old"""
+        if member.remaining is not None and time.time() - member.quota_checked_at < self.quota_refresh:
+            return
+        try:
+            remaining = int(member.client.get_quota().get("remaining", 0))
+        except (requests.RequestException, CodeepException):
+            # Keep routing on the last known value rather than failing the submit
+            return
+        with self._lock:
+            member.remaining = remaining
+            member.quota_checked_at = time.time()
+
+    def _candidates(self) -> List[_Member]:
+        """Get members ordered by preference for the next task"""
+        for member in self._members:
+            # in_flight routing only needs quota to bring exhausted accounts back
+            if self.strategy == "quota" or member.remaining == 0:
+                self._refresh_quota(member)
+        now = time.monotonic()
+        with self._lock:
+            members = [
+                m for m in self._members
+                if (m.remaining is None or m.remaining > 0) and m.backoff_until <= now
+            ]
+            if self.strategy == "quota":
+                members.sort(key=lambda m: (-(m.remaining or 0), m.in_flight))
+            else:
+                members.sort(key=lambda m: m.in_flight)
+            return members
+
+    def create_task(
+        self,
+        prompt: str,
+        toolset: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Task:
+        """Create a task on the best account, moving on when one is out of quota"""
+        for attempt in range(self.max_backoffs + 1):
+            for member in self._candidates():
+                try:
+                    task = member.client.create_task(prompt, toolset, timeout=timeout)
+                except requests.HTTPError as e:
+                    if e.response is not None and e.response.status_code == 429:
+                        if self._quota_spent(member):
+                            self._mark_exhausted(member)
+                        else:
+                            self._back_off(member, e.response)
+                        continue
+                    raise
+                with self._lock:
+                    self._owners[task.task_id] = member
+                    self._active.add(task.task_id)
+                    member.in_flight += 1
+                    if member.remaining is not None:
+                        member.remaining -= 1
+                return task
+            wait = self._backoff_wait()
+            if wait is None or attempt == self.max_backoffs:
+                break
+            time.sleep(wait)
+        raise QuotaExceededError("All pooled accounts are out of quota or rate limited", 429)
+
+    def _quota_spent(self, member: _Member) -> bool:
+        """Check whether a 429 came from a spent daily quota rather than a rate limit"""
+        try:
+            return member.client.validate_quota().get("valid") is False
+        except (requests.RequestException, CodeepException):
+            # Back off as for a rate limit; the account is tried again later
+            return False
+
+    def _mark_exhausted(self, member: _Member):
+        with self._lock:
+            member.remaining = 0
+            member.quota_checked_at = time.time()
+
+    def _back_off(self, member: _Member, response: requests.Response):
+        """Skip a rate-limited account until its Retry-After has passed"""
+        try:
+            delay = float(response.headers.get("Retry-After", ""))
+        except (TypeError, ValueError):
+            delay = self.rate_limit_backoff
+        with self._lock:
+            member.backoff_until = time.monotonic() + delay
+
+    def _backoff_wait(self) -> Optional[float]:
+        """Get seconds until a rate-limited account with quota is usable again"""
+        now = time.monotonic()
+        with self._lock:
+            waits = [
+                m.backoff_until - now
+                for m in self._members
+                if m.backoff_until > now and (m.remaining is None or m.remaining > 0)
+            ]
+        return max(0.0, min(waits)) if waits else None
+
+    def _owner(self, task_id: str) -> _Member:
+        """Find the account that owns a task, pinning it once discovered"""
+        with self._lock:
+            member = self._owners.get(task_id)
+        if member is not None:
+            return member
+        # Tasks created outside this pool: ask each account until one owns it
+        for member in self._members:
+            try:
+                member.client.get_task(task_id)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code in (403, 404):
+                    continue
+                raise
+            with self._lock:
+                self._owners[task_id] = member
+            return member
+        raise ValidationError(f"No pooled account owns task {task_id}")
+
+    def client_for(self, task_id: str) -> CodeepClient:
+        """Get the client a task is pinned to"""
+        return self._owner(task_id).client
+
+    def _settle(self, task_id: str, task: Optional[Task] = None):
+        """Release a task's in-flight slot and pin once it is finished or gone"""
+        if task is not None and task.status not in TERMINAL_STATUSES:
+            return
+        with self._lock:
+            member = self._owners.pop(task_id, None)
+            if task_id in self._active:
+                self._active.discard(task_id)
+                if member is not None:
+                    member.in_flight -= 1
+
+    def get_task(self, task_id: str, timeout: Optional[float] = None) -> Task:
+        """Get specific task details from the owning account"""
+        task = self.client_for(task_id).get_task(task_id, timeout=timeout)
+        self._settle(task_id, task)
+        return task
+
+    def wait_for_completion(
+        self, task_id: str, timeout: int = 300, poll_interval: int = 5, **kwargs
+    ) -> Task:
+        """Wait for task completion on the owning account
+
+        Extra keyword arguments (``cancel_token``, ``deadline``,
+        ``cancel_remote``) are passed through to the owning client.
+        """
+        task = None
+        try:
+            task = self.client_for(task_id).wait_for_completion(
+                task_id, timeout, poll_interval, **kwargs
+            )
+            return task
+        finally:
+            # A wait that raised has abandoned the task (and cancel_remote may
+            # have removed it behind the pool's back), so release it either way
+            self._settle(task_id, task)
+
+    def get_task_results(self, task_id: str) -> Dict:
+        """Get detailed results from the owning account"""
+        return self.client_for(task_id).get_task_results(task_id)
+
+    def download_task_results(self, task_id: str, destination, **kwargs) -> Dict:
+        """Stream task results from the owning account"""
+        return self.client_for(task_id).download_task_results(task_id, destination, **kwargs)
+
+    def update_task(self, task_id: str, **kwargs) -> Task:
+        """Update a task on the owning account"""
+        task = self.client_for(task_id).update_task(task_id, **kwargs)
+        self._settle(task_id, task)
+        return task
+
+    def delete_task(self, task_id: str) -> Dict:
+        """Delete a task on the owning account"""
+        result = self.client_for(task_id).delete_task(task_id)
+        self._settle(task_id)
+        return result
+
+    def get_user_tasks(self) -> List[Task]:
+        """Get tasks across every pooled account"""
+        tasks = []
+        for member in self._members:
+            tasks.extend(member.client.get_user_tasks())
+        return tasks
+
+    def get_queue_status(self) -> Dict:
+        """Get current queue statistics"""
+        return self._members[0].client.get_queue_status()
+
+    def stats(self) -> List[Dict]:
+        """Get remaining quota and in-flight count per account"""
+        with self._lock:
+            return [
+                {"base_url": m.client.base_url, "remaining": m.remaining, "in_flight": m.in_flight}
+                for m in self._members
+            ]
+
+    @property
+    def llm(self) -> CodeepLLM:
+        """Get a LangChain compatible LLM backed by the pool"""
+        if self._llm is None:
+            self._llm = CodeepLLM(client=self)
+        return self._llm
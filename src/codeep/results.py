@@ -0,0 +1,169 @@
+"""Streaming and memory-mapped access to large task results"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+from typing import IO, BinaryIO, Dict, Optional, Union
+
+import requests
+
+from .exceptions import ValidationError
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+Destination = Union[str, "os.PathLike[str]", BinaryIO]
+
+
+def _default_file_mode() -> int:
+    """Get the mode open() gives new files: 0666 less the process umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once: os.umask can only be read by setting it, which races with
+# downloads running on other threads
+_FILE_MODE = _default_file_mode()
+
+
+def stream_response(
+    response: requests.Response,
+    destination: Destination,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checksum: Optional[str] = None,
+    expected_digest: Optional[str] = None,
+) -> Dict:
+    """Write a streamed response body to a path or writable without buffering it
+
+    When ``destination`` is a path the body is written to a temporary sibling
+    file and renamed into place once complete, so readers never observe a
+    partial file.
+    """
+    if expected_digest and not checksum:
+        raise ValidationError("expected_digest requires a checksum algorithm")
+    hasher = hashlib.new(checksum) if checksum else None
+
+    if isinstance(destination, (str, os.PathLike)):
+        target = os.fspath(destination)
+        # A unique sibling keeps concurrent downloads to one path apart
+        fh = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(target) or ".", suffix=".part", delete=False
+        )
+        tmp_path = fh.name
+        try:
+            with fh:
+                written = _copy_chunks(response, fh, chunk_size, hasher)
+            _verify_digest(hasher, expected_digest, target)
+            # NamedTemporaryFile creates 0600 files; give the result the mode
+            # a plain open() would
+            os.chmod(tmp_path, _FILE_MODE)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        path: Optional[str] = target
+    else:
+        written = _copy_chunks(response, destination, chunk_size, hasher)
+        _verify_digest(hasher, expected_digest, "stream")
+        path = None
+
+    return {
+        "path": path,
+        "bytes_written": written,
+        "checksum": checksum,
+        "digest": hasher.hexdigest() if hasher else None,
+    }
+
+
+def _verify_digest(hasher, expected_digest: Optional[str], target: str):
+    """Raise ValidationError if the computed digest does not match"""
+    if hasher is None or not expected_digest:
+        return
+    digest = hasher.hexdigest()
+    if digest != expected_digest.lower():
+        raise ValidationError(
+            f"Checksum mismatch for {target}: expected {expected_digest}, got {digest}"
+        )
+
+
+def _copy_chunks(response: requests.Response, fh: IO[bytes], chunk_size: int, hasher) -> int:
+    """Copy response chunks into ``fh``, updating ``hasher`` as it goes"""
+    written = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if not chunk:
+            continue
+        fh.write(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+        written += len(chunk)
+    return written
+
+
+class MappedResults:
+    """Read-only memory-mapped view of a results file
+
+    Slicing returns ``bytes`` for the requested range only, and ``view()``
+    returns a zero-copy ``memoryview`` over the whole file. Release views
+    (``view.release()``) before closing; a view still alive at ``close()``
+    keeps the mapping open until it is released, though the file itself is
+    closed either way.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]):
+        self.path = os.fspath(path)
+        self._file = open(self.path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            # mmap cannot map empty files
+            self._map = (
+                mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+            )
+        except Exception:
+            self._file.close()
+            raise
+        self._size = size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, key):
+        if self._map is None:
+            return b""[key]
+        return self._map[key]
+
+    def view(self) -> memoryview:
+        """Get a zero-copy memoryview over the mapped file"""
+        if self._map is None:
+            return memoryview(b"")
+        return memoryview(self._map)
+
+    def find(self, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        """Find ``sub`` in the mapped file without copying it"""
+        if self._map is None:
+            return -1
+        return self._map.find(sub, start, self._size if end is None else end)
+
+    def close(self):
+        """Unmap and close the underlying file"""
+        try:
+            if self._map is not None:
+                self._map.close()
+        except BufferError:
+            # Views are still exported; the map is unmapped once they are
+            # released and garbage collected
+            pass
+        finally:
+            self._map = None
+            self._file.close()
+
+    def __enter__(self) -> "MappedResults":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def map_results(path: Union[str, "os.PathLike[str]"]) -> MappedResults:
+    """Memory-map a downloaded results file for zero-copy slicing"""
+    return MappedResults(path)
@@ -0,0 +1,177 @@
+"""Latency-based routing and failover across several API base URLs"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class Endpoint:
+    """Health and latency bookkeeping for a single base URL"""
+
+    __slots__ = ("url", "latency", "healthy", "failures", "last_checked")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None
+        self.healthy = True
+        self.failures = 0
+        self.last_checked: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "url": self.url,
+            "latency": self.latency,
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "last_checked": self.last_checked,
+        }
+
+
+class EndpointRouter:
+    """Pick the lowest-latency healthy endpoint and fail over when one degrades
+
+    Latency is an exponentially weighted moving average fed by both live
+    requests and ``/health`` probes. An endpoint is marked unhealthy after
+    ``failure_threshold`` consecutive failures and healthy again on the next
+    success, so probing lets it rejoin the rotation.
+    """
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        alpha: float = 0.3,
+        failure_threshold: int = 2,
+        probe_timeout: float = 5.0,
+    ):
+        if not base_urls:
+            raise ValueError("EndpointRouter needs at least one base URL")
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Endpoint] = {}
+        self._probe_session = requests.Session()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop_probing = threading.Event()
+        self.set_endpoints(base_urls)
+
+    @property
+    def endpoints(self) -> List[str]:
+        """Get the configured base URLs"""
+        with self._lock:
+            return list(self._endpoints)
+
+    def set_endpoints(self, base_urls: List[str]) -> None:
+        """Replace the endpoint set, keeping stats for URLs that remain"""
+        if not base_urls:
+            raise ValueError("EndpointRouter needs at least one base URL")
+        with self._lock:
+            current = self._endpoints
+            self._endpoints = {}
+            for url in base_urls:
+                url = url.rstrip("/")
+                self._endpoints[url] = current.get(url) or Endpoint(url)
+
+    def ranked(self) -> List[str]:
+        """Get endpoints in the order requests should try them
+
+        Healthy endpoints come first by latency, with unmeasured ones ahead so
+        they get sampled; unhealthy endpoints are kept as a last resort.
+        """
+        with self._lock:
+            endpoints = list(self._endpoints.values())
+        healthy = [e for e in endpoints if e.healthy]
+        unhealthy = [e for e in endpoints if not e.healthy]
+        healthy.sort(key=lambda e: -1.0 if e.latency is None else e.latency)
+        unhealthy.sort(key=lambda e: e.failures)
+        return [e.url for e in healthy + unhealthy]
+
+    def select(self) -> str:
+        """Get the endpoint the next request should go to"""
+        return self.ranked()[0]
+
+    def record_success(self, url: str, latency: float) -> None:
+        """Record a successful request and its latency"""
+        with self._lock:
+            endpoint = self._endpoints.get(url)
+            if endpoint is None:
+                return
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency = self.alpha * latency + (1 - self.alpha) * endpoint.latency
+            endpoint.failures = 0
+            endpoint.healthy = True
+
+    def record_failure(self, url: str) -> None:
+        """Record a failed request, marking the endpoint unhealthy past the threshold"""
+        with self._lock:
+            endpoint = self._endpoints.get(url)
+            if endpoint is None:
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.failure_threshold and endpoint.healthy:
+                endpoint.healthy = False
+                logger.warning("Endpoint %s marked unhealthy", url)
+
+    def probe(self) -> Dict[str, bool]:
+        """Call ``/health`` on every endpoint and update health and latency"""
+        results = {}
+        for url in self.endpoints:
+            start = time.monotonic()
+            try:
+                response = self._probe_session.get(f"{url}/health", timeout=self.probe_timeout)
+                response.raise_for_status()
+                ok = response.json().get("status") == "healthy"
+            except (requests.RequestException, ValueError):
+                ok = False
+            elapsed = time.monotonic() - start
+            with self._lock:
+                endpoint = self._endpoints.get(url)
+                if endpoint is not None:
+                    endpoint.last_checked = time.time()
+            if ok:
+                self.record_success(url, elapsed)
+            else:
+                # A failed probe is conclusive; don't wait for more failures
+                with self._lock:
+                    endpoint = self._endpoints.get(url)
+                    if endpoint is not None:
+                        endpoint.failures += 1
+                        endpoint.healthy = False
+            results[url] = ok
+        return results
+
+    def start_probing(self, interval: float = 30.0) -> None:
+        """Probe all endpoints every ``interval`` seconds in a daemon thread"""
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        self._stop_probing.clear()
+
+        def _loop():
+            while not self._stop_probing.is_set():
+                try:
+                    self.probe()
+                except Exception:
+                    logger.warning("Endpoint probe failed", exc_info=True)
+                self._stop_probing.wait(interval)
+
+        self._probe_thread = threading.Thread(target=_loop, daemon=True)
+        self._probe_thread.start()
+
+    def stop_probing(self) -> None:
+        """Stop the background probe thread"""
+        self._stop_probing.set()
+        if self._probe_thread is not None:
+            self._probe_thread.join(timeout=self.probe_timeout)
+            self._probe_thread = None
+
+    def status(self) -> List[Dict]:
+        """Get health and latency for every endpoint"""
+        with self._lock:
+            return [e.to_dict() for e in self._endpoints.values()]
@@ -0,0 +1,283 @@
+"""Shared HTTP session used by the auth and task clients"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Union
+
+import requests
+
+from .breaker import CircuitBreakers
+from .hedging import HedgePolicy
+from .routing import EndpointRouter
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# (connect, read) seconds for requests that do not set their own timeout
+DEFAULT_TIMEOUT = (10.0, 60.0)
+
+
+class CodeepSession(requests.Session):
+    """requests.Session that routes API calls across several base URLs
+
+    Clients keep building URLs from ``base_url``; when a router is attached,
+    that prefix is swapped for the best endpoint at send time and the request
+    fails over to the next endpoint on connection errors or 5xx responses.
+    Non-idempotent requests only fail over when the server cannot have seen
+    them (connect timeouts and 503s). Requests with their own ``timeout``
+    never fail over on a timeout, since the next endpoint would get the whole
+    budget again, and a read timeout under that budget is not held against
+    the endpoint.
+
+    With a ``hedge_policy``, eligible GETs that are slower than the policy's
+    latency percentile get a duplicate request and the first successful
+    response wins.
+
+    With ``circuit_breakers``, calls to each endpoint class (auth, tasks) pass
+    through that class's breaker, which fails fast with NetworkError while
+    open and probes recovery with ``/health``. Connection errors, connect
+    timeouts, 5xx responses and read timeouts the caller did not set count
+    as failures; other exceptions pass through without touching the breaker.
+
+    Requests without a ``timeout`` get ``timeout`` (``DEFAULT_TIMEOUT`` unless
+    overridden), so a hanging connection cannot block forever.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        router: Optional[EndpointRouter] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        hedge_workers: int = 16,
+        circuit_breakers: Optional[CircuitBreakers] = None,
+        timeout: Optional[Union[float, Tuple[float, float]]] = DEFAULT_TIMEOUT,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.router = router
+        self.hedge_policy = hedge_policy
+        self.hedge_workers = hedge_workers
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        # Hedges only run when a worker is free; a queued hedge just adds load
+        self._hedge_slots = threading.BoundedSemaphore(hedge_workers)
+        self._executor_lock = threading.Lock()
+        self.circuit_breakers = circuit_breakers
+        if circuit_breakers is not None:
+            circuit_breakers.set_probe(self.probe_health)
+
+    def request(self, method, url, *args, **kwargs):
+        caller_timeout = kwargs.get("timeout") is not None
+        breaker = None
+        if self.circuit_breakers is not None and self.base_url and url.startswith(self.base_url):
+            breaker = self.circuit_breakers.for_path(url[len(self.base_url):])
+        if breaker is None:
+            return self._dispatch(method, url, *args, **kwargs)
+
+        breaker.before_call()
+        try:
+            response = self._dispatch(method, url, *args, **kwargs)
+        except requests.ConnectTimeout:
+            # No connection within the budget is a backend failure however
+            # the budget was chosen
+            breaker.record_failure()
+            raise
+        except requests.Timeout:
+            if caller_timeout:
+                # The caller chose this budget (e.g. from a Deadline); running
+                # out of it says nothing about the backend's health
+                breaker.release()
+            else:
+                breaker.record_failure()
+            raise
+        except requests.ConnectionError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def probe_health(self) -> bool:
+        """Check ``/health`` without going through the circuit breakers"""
+        if not self.base_url:
+            return True
+        try:
+            response = self._send("GET", f"{self.base_url}/health", timeout=5)
+            return response.status_code == 200 and response.json().get("status") == "healthy"
+        except (requests.RequestException, ValueError):
+            return False
+
+    def _dispatch(self, method, url, *args, **kwargs):
+        if self.hedge_policy is not None and self.hedge_policy.applies(method, url, kwargs):
+            return self._hedged_request(method, url, *args, **kwargs)
+        return self._send(method, url, *args, **kwargs)
+
+    def close(self):
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        super().close()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.hedge_workers, thread_name_prefix="codeep-hedge"
+                )
+            return self._hedge_executor
+
+    def _timed_send(self, method, url, *args, **kwargs):
+        start = time.monotonic()
+        response = self._send(method, url, *args, **kwargs)
+        self.hedge_policy.observe(time.monotonic() - start)
+        return response
+
+    def _hedged_request(self, method, url, *args, **kwargs):
+        policy = self.hedge_policy
+        delay = policy.hedge_delay()
+        if delay is None or not policy.can_hedge():
+            return self._timed_send(method, url, *args, **kwargs)
+
+        # requests cannot be interrupted, so the primary gets its own thread
+        # rather than queueing behind other callers in the hedge pool
+        race = _HedgeRace()
+        race.launch(_start_thread, False, self._timed_send, method, url, *args, **kwargs)
+        if not race.wait(delay) and self._hedge_slots.acquire(blocking=False):
+            if policy.acquire():
+                race.launch(
+                    self._executor().submit, True, self._hedge_send, method, url, *args, **kwargs
+                )
+            else:
+                self._hedge_slots.release()
+        race.wait()
+        response, hedge_won = race.settle()
+        if hedge_won:
+            policy.record_win()
+        return response
+
+    def _hedge_send(self, method, url, *args, **kwargs):
+        try:
+            return self._timed_send(method, url, *args, **kwargs)
+        finally:
+            self._hedge_slots.release()
+
+    def _send(self, method, url, *args, **kwargs):
+        caller_timeout = kwargs.get("timeout") is not None
+        if not caller_timeout and self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+        if self.router is None or not self.base_url or not url.startswith(self.base_url):
+            return super().request(method, url, *args, **kwargs)
+        return self._routed_request(
+            method, url[len(self.base_url):], *args, caller_timeout=caller_timeout, **kwargs
+        )
+
+    def _routed_request(self, method, path, *args, caller_timeout=False, **kwargs):
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        endpoints = self.router.ranked()
+        for i, endpoint in enumerate(endpoints):
+            is_last = i == len(endpoints) - 1
+            start = time.monotonic()
+            try:
+                response = super().request(method, endpoint + path, *args, **kwargs)
+            except requests.ConnectTimeout:
+                self.router.record_failure(endpoint)
+                # The next endpoint would get the caller's whole budget again
+                if is_last or caller_timeout:
+                    raise
+                continue
+            except requests.Timeout:
+                if caller_timeout:
+                    # The caller's budget (e.g. from a Deadline) ran out; that
+                    # says nothing about the endpoint's health
+                    raise
+                self.router.record_failure(endpoint)
+                if is_last or not idempotent:
+                    raise
+                continue
+            except requests.ConnectionError:
+                self.router.record_failure(endpoint)
+                if is_last or not idempotent:
+                    raise
+                continue
+
+            retryable = response.status_code == 503 or (
+                idempotent and response.status_code >= 500
+            )
+            if retryable:
+                self.router.record_failure(endpoint)
+                if not is_last:
+                    response.close()
+                    continue
+                return response
+
+            self.router.record_success(endpoint, time.monotonic() - start)
+            return response
+
+
+def _start_thread(fn):
+    threading.Thread(target=fn, name="codeep-primary", daemon=True).start()
+
+
+class _HedgeRace:
+    """A primary request and its optional hedge; the first success wins
+
+    A response below 500 wins as soon as it arrives. If no attempt
+    succeeds, the primary's outcome is returned, preferring a response over
+    an exception. Responses that lose are closed to release their connection.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._started = 0
+        self._outcomes = []
+        self._winner = None
+        self._settled = False
+
+    def launch(self, start, is_hedge, send, *args, **kwargs):
+        with self._cond:
+            self._started += 1
+        start(lambda: self._run(is_hedge, send, *args, **kwargs))
+
+    def _run(self, is_hedge, send, *args, **kwargs):
+        response = error = None
+        try:
+            response = send(*args, **kwargs)
+        except BaseException as e:
+            error = e
+        with self._cond:
+            outcome = (is_hedge, response, error)
+            self._outcomes.append(outcome)
+            if self._winner is None and response is not None and response.status_code < 500:
+                self._winner = outcome
+            elif self._settled and response is not None:
+                response.close()
+            self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until an attempt succeeds or every attempt has finished"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._winner is not None or len(self._outcomes) == self._started,
+                timeout,
+            )
+
+    def settle(self):
+        """Get ``(response, hedge_won)``, raising if every attempt failed"""
+        with self._cond:
+            self._settled = True
+            chosen = self._winner
+            if chosen is None:
+                responses = [o for o in self._outcomes if o[1] is not None]
+                chosen = min(responses or self._outcomes, key=lambda o: o[0])
+            for outcome in self._outcomes:
+                if outcome is not chosen and outcome[1] is not None:
+                    outcome[1].close()
+            hedge_won = chosen is self._winner and chosen[0]
+        if chosen[2] is not None:
+            raise chosen[2]
+        return chosen[1], hedge_won
@@ -1,12 +1,20 @@
 """Task management module for Codeep AI API"""
 
+import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
+from urllib.parse import urlsplit
 from pydantic import BaseModel
 import requests
+from .bulk import DEFAULT_RATE_LIMIT, BulkResult, ProgressCallback, RateLimiter, run_bulk
+from .cancellation import CancellationToken, Deadline
 from .config import Config
+from .journal import TaskJournal
+from .results import DEFAULT_CHUNK_SIZE, Destination, stream_response
 from .exceptions import (
     TaskError,
+    TaskCancelledError,
     TaskTimeoutError,
     APIError,
     NetworkError,
@@ -14,6 +22,11 @@ from .exceptions import (
     AuthorizationError,
 )
 
+logger = logging.getLogger(__name__)
+
+# How an abandoned task is cancelled server-side
+CANCEL_REMOTE_MODES = (None, "update", "delete")
+
 
 class Task(BaseModel):
     task_id: str
@@ -32,21 +45,37 @@ class Task(BaseModel):
 class TaskClient:
     """Client for task management endpoints"""
 
-    def __init__(self, base_url: Optional[str] = None, session: Optional[requests.Session] = None):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        journal: Optional[TaskJournal] = None,
+        rate_limit: Optional[float] = DEFAULT_RATE_LIMIT,
+    ):
         self.base_url = (base_url or Config.get_base_url()).rstrip("/")
         self.session = session or requests.Session()
+        self.journal = journal
+        # Shared by every bulk call so together they respect the per-user limit
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
 
-    def create_task(self, prompt: str, toolset: Optional[List[str]] = None) -> Task:
+    def create_task(
+        self,
+        prompt: str,
+        toolset: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Task:
         """Create a new task"""
         url = f"{self.base_url}/tasks/tasks"
         payload = {"prompt": prompt}
         if toolset:
             payload["toolset"] = toolset
 
-        response = self.session.post(url, json=payload)
+        response = self.session.post(url, json=payload, timeout=timeout)
         response.raise_for_status()
         data = response.json()
-        return Task(**data["task"])
+        task = Task(**data["task"])
+        self._journal(task.task_id, task.status, submitted=True)
+        return task
 
     def get_user_tasks(self) -> List[Task]:
         """Get all tasks for the authenticated user"""
@@ -56,10 +85,10 @@ class TaskClient:
         data = response.json()
         return [Task(**task) for task in data["tasks"]]
 
-    def get_task(self, task_id: str) -> Task:
+    def get_task(self, task_id: str, timeout: Optional[float] = None) -> Task:
         """Get specific task details"""
         url = f"{self.base_url}/tasks/tasks/{task_id}"
-        response = self.session.get(url)
+        response = self.session.get(url, timeout=timeout)
         response.raise_for_status()
         data = response.json()
         return Task(**data["task"])
@@ -77,8 +106,57 @@ class TaskClient:
         url = f"{self.base_url}/tasks/tasks/{task_id}"
         response = self.session.delete(url)
         response.raise_for_status()
+        self._journal(task_id, "deleted")
         return response.json()
 
+    def get_tasks(
+        self,
+        task_ids: List[str],
+        max_workers: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, BulkResult]:
+        """Fetch many tasks concurrently, returning a per-ID outcome"""
+        return run_bulk(
+            lambda task_id, _: self.get_task(task_id),
+            ((task_id, None) for task_id in task_ids),
+            max_workers=max_workers,
+            limiter=rate_limiter or self.rate_limiter,
+            progress=progress,
+        )
+
+    def bulk_update_tasks(
+        self,
+        updates: Dict[str, Dict],
+        max_workers: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, BulkResult]:
+        """Update many tasks concurrently from a ``{task_id: fields}`` mapping"""
+        return run_bulk(
+            lambda task_id, fields: self.update_task(task_id, **fields),
+            updates.items(),
+            max_workers=max_workers,
+            limiter=rate_limiter or self.rate_limiter,
+            progress=progress,
+        )
+
+    def bulk_delete_tasks(
+        self,
+        task_ids: List[str],
+        max_workers: int = 8,
+        rate_limiter: Optional[RateLimiter] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, BulkResult]:
+        """Delete many tasks concurrently, returning a per-ID outcome"""
+        return run_bulk(
+            lambda task_id, _: self.delete_task(task_id),
+            ((task_id, None) for task_id in task_ids),
+            max_workers=max_workers,
+            limiter=rate_limiter or self.rate_limiter,
+            progress=progress,
+        )
+
     def get_task_results(self, task_id: str) -> Dict:
         """Get detailed results for a completed task"""
         url = f"{self.base_url}/tasks/tasks/{task_id}/results"
@@ -86,15 +164,157 @@ class TaskClient:
         response.raise_for_status()
         return response.json()
 
-    def wait_for_completion(self, task_id: str, timeout: int = 300, poll_interval: int = 5) -> Task:
-        """Wait for task completion with polling"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            task = self.get_task(task_id)
+    def download_task_results(
+        self,
+        task_id: str,
+        destination: Destination,
+        artifact: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        checksum: Optional[str] = None,
+        expected_digest: Optional[str] = None,
+    ) -> Dict:
+        """Stream task results to a file path or writable without buffering
+
+        With ``artifact`` set (e.g. ``"output.json"``), the matching entry from
+        the task's ``result_urls`` is streamed instead of the results body.
+        """
+        headers: Optional[Dict[str, Any]] = None
+        if artifact is None:
+            url = f"{self.base_url}/tasks/tasks/{task_id}/results"
+        else:
+            result_urls = self.get_task_results(task_id).get("result_urls") or {}
+            if artifact not in result_urls:
+                raise ValidationError(f"Task {task_id} has no result artifact '{artifact}'")
+            url = result_urls[artifact]
+            if not self._is_api_url(url):
+                # Never send the API bearer token to third-party hosts
+                headers = {"Authorization": None}
+
+        response = self.session.get(url, stream=True, headers=headers)
+        try:
+            response.raise_for_status()
+            return stream_response(
+                response,
+                destination,
+                chunk_size=chunk_size,
+                checksum=checksum,
+                expected_digest=expected_digest,
+            )
+        finally:
+            response.close()
+
+    def _is_api_url(self, url: str) -> bool:
+        """Check whether a URL points at the configured API origin"""
+        api, target = urlsplit(self.base_url), urlsplit(url)
+        return (api.scheme, api.netloc) == (target.scheme, target.netloc)
+
+    def wait_for_completion(
+        self,
+        task_id: str,
+        timeout: int = 300,
+        poll_interval: int = 5,
+        cancel_token: Optional[CancellationToken] = None,
+        deadline: Optional[Deadline] = None,
+        cancel_remote: Optional[str] = None,
+    ) -> Task:
+        """Wait for task completion with polling
+
+        The wait ends at the earlier of ``timeout`` and ``deadline``, and each
+        status request only gets the time that is left. Cancelling
+        ``cancel_token`` ends the wait with TaskCancelledError. With
+        ``cancel_remote`` set to ``"update"`` or ``"delete"``, a task that is
+        abandoned (cancelled or timed out) is also marked cancelled or deleted
+        server-side so it stops using quota.
+        """
+        if cancel_remote not in CANCEL_REMOTE_MODES:
+            raise ValidationError(f"cancel_remote must be one of {CANCEL_REMOTE_MODES}")
+        deadline = Deadline.earliest(Deadline(timeout), deadline)
+
+        while not deadline.expired:
+            if cancel_token is not None and cancel_token.cancelled:
+                self._abandon(task_id, cancel_remote)
+                raise TaskCancelledError(f"Wait for task {task_id} was cancelled")
+            try:
+                task = self.get_task(task_id, timeout=deadline.request_timeout())
+            except requests.Timeout:
+                if deadline.expired:
+                    break
+                raise
+            self._journal(task_id, task.status)
             if task.status in ["completed", "failed"]:
                 return task
-            time.sleep(poll_interval)
-        raise TaskTimeoutError(f"Task {task_id} did not complete within {timeout} seconds")
+            delay = min(poll_interval, deadline.remaining())
+            if cancel_token is not None:
+                cancel_token.wait(delay)
+            else:
+                time.sleep(delay)
+
+        self._abandon(task_id, cancel_remote)
+        raise TaskTimeoutError(
+            f"Task {task_id} did not complete within {deadline.timeout} seconds"
+        )
+
+    def _abandon(self, task_id: str, cancel_remote: Optional[str]):
+        """Best-effort server-side cancellation of a task nobody is waiting for"""
+        if cancel_remote is None:
+            return
+        try:
+            if cancel_remote == "delete":
+                self.delete_task(task_id)
+            else:
+                self.update_task(task_id, status="cancelled")
+                self._journal(task_id, "cancelled")
+        except requests.RequestException:
+            logger.warning("Could not cancel task %s server-side", task_id, exc_info=True)
+
+    def resume_pending(
+        self, timeout: int = 300, poll_interval: int = 5, max_workers: int = 8
+    ) -> Dict[str, Task]:
+        """Reattach to unfinished journaled tasks and wait for them concurrently
+
+        Returns the tasks that finished. Tasks that time out or cannot be
+        polled are logged and left in ``journal.pending()`` for a later call.
+        """
+        if self.journal is None:
+            raise ValidationError("resume_pending requires a task journal")
+
+        pending = self.journal.pending()
+        finished: Dict[str, Task] = {}
+        if not pending:
+            return finished
+
+        def reattach(task_id: str) -> Optional[Task]:
+            try:
+                return self.wait_for_completion(task_id, timeout, poll_interval)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    # The task no longer exists server-side; stop tracking it
+                    self._journal(task_id, "deleted")
+                    return None
+                logger.warning("Could not poll journaled task %s: %s", task_id, e)
+            except (TaskTimeoutError, requests.RequestException) as e:
+                logger.warning("Journaled task %s is still pending: %s", task_id, e)
+            return None
+
+        workers = max(1, min(max_workers, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="codeep-resume") as executor:
+            for task_id, task in zip(pending, executor.map(reattach, pending)):
+                if task is not None:
+                    self._journal(task_id, task.status)
+                    finished[task_id] = task
+        return finished
+
+    def _journal(self, task_id: str, status: str, submitted: bool = False):
+        """Record a state transition for a journaled task if journaling is enabled
+
+        Only ``create_task`` (``submitted=True``) adds new IDs, so deleting or
+        polling tasks this client never submitted leaves the journal alone.
+        """
+        if self.journal is None:
+            return
+        current = self.journal.status(task_id)
+        if current != status and (current is not None or submitted):
+            self.journal.record(task_id, status)
 
     def get_queue_status(self) -> Dict:
         """Get current queue statistics"""
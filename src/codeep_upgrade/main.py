@@ -1,16 +1,167 @@
+import functools
+import heapq
 import logging
-from typing import Dict, Any, Optional
+import operator
+import re
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_VERSION = re.compile(r"(\d+(?:\.\d+)*)(?:[.\-_]?([A-Za-z]+)[.\-_]?(\d*))?")
+_CONSTRAINT = re.compile(r"^\s*(>=|<=|==|!=|>|<)?\s*(\S+)\s*$")
+
+# Pre-release labels in ascending order; all sort before the final release
+_PRE_RELEASE = {"dev": 0, "a": 1, "alpha": 1, "b": 2, "beta": 2, "c": 3, "rc": 3, "pre": 3}
+_POST_RELEASE = ("post", "rev", "r")
+
+
+@functools.lru_cache(maxsize=None)
+def _version_key(version: str) -> Tuple:
+    """
+    Build a sortable key from a version string like 'v2.1.0' or '2.0rc1'.
+    
+    The key is (release numbers, phase). Trailing zeros are dropped from the
+    release so 2.0 == 2.0.0, and the phase orders pre-releases before the
+    final release and post-releases after it: 2.0rc1 < 2.0 < 2.0.post1 < 2.0.1.
+    """
+    match = _VERSION.match(version.strip().lstrip("vV"))
+    if match is None:
+        return ((), (1, 0, 0))
+    release = [int(part) for part in match.group(1).split(".")]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    label = (match.group(2) or "").lower()
+    number = int(match.group(3) or 0)
+    if not label:
+        phase = (1, 0, 0)
+    elif label in _POST_RELEASE:
+        phase = (2, 0, number)
+    else:
+        phase = (0, _PRE_RELEASE.get(label, 0), number)
+    return (tuple(release), phase)
+
+
+# Key for a package that is not installed; below every real version
+_NOT_INSTALLED: Tuple = ((), (0, 0, 0))
+
+_OPERATORS = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _just_above(key: Tuple) -> Tuple:
+    """Get a key greater than ``key`` but below any later release."""
+    release, phase = key
+    return (release, phase + (1,))
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_constraint(spec: str) -> Tuple[Tuple[Tuple[str, Tuple], ...], Optional[Tuple]]:
+    """
+    Parse a constraint such as '>=1.2,<2.0' once.
+    
+    Returns:
+        ((operator, version key) clauses, lowest version key meeting them all
+        or None if no version can)
+    """
+    clauses = []
+    for clause in spec.split(","):
+        if not clause.strip():
+            continue
+        match = _CONSTRAINT.match(clause)
+        if match is None:
+            raise ValueError(f"Invalid version constraint: {clause!r}")
+        clauses.append((match.group(1) or "==", _version_key(match.group(2))))
+    
+    floor = _NOT_INSTALLED
+    for op, required in clauses:
+        if op in (">=", "=="):
+            floor = max(floor, required)
+        elif op == ">":
+            floor = max(floor, _just_above(required))
+    # An excluded floor moves just above the exclusion: >=2,!=2 allows 2.0.1
+    candidates = sorted(
+        {floor} | {_just_above(required) for op, required in clauses if op == "!=" and required >= floor}
+    )
+    lowest = next(
+        (key for key in candidates if all(_OPERATORS[op](key, required) for op, required in clauses)),
+        None,
+    )
+    return tuple(clauses), lowest
+
+
+def _check_key(installed: Tuple, spec: str) -> Tuple[str, Optional[Tuple]]:
+    """
+    Check an installed version key against a constraint such as '>=1.2,<2.0'.
+    
+    Returns:
+        (outcome, minimum): outcome is 'ok' if satisfied, 'upgrade' if only
+        minimum-version clauses fail (and raising to ``minimum`` satisfies
+        the whole constraint), or 'conflict' otherwise. ``minimum`` is the
+        lowest version key that satisfies the constraint, if any.
+    """
+    clauses, minimum = _parse_constraint(spec)
+    outcome = "ok"
+    for op, required in clauses:
+        if _OPERATORS[op](installed, required):
+            continue
+        if op in (">=", ">") or (op == "==" and installed < required):
+            outcome = "upgrade"
+        else:
+            return "conflict", minimum
+    if outcome == "upgrade" and minimum is None:
+        # No version meets both the lower and upper bounds
+        return "conflict", None
+    return outcome, minimum
+
+
+def _check_constraint(installed: str, spec: str) -> str:
+    """
+    Check an installed version against a constraint such as '>=1.2,<2.0'.
+    
+    Returns:
+        'ok' if satisfied, 'upgrade' if only minimum-version clauses fail,
+        or 'conflict' if an upper-bound or exclusion clause fails.
+    """
+    return _check_key(_version_key(installed), spec)[0]
+
+
+class _Label:
+    """A way of reaching a version: its cost, packages raised and the step there."""
+    
+    __slots__ = ("cost", "version", "state", "parent", "upgrades", "alive")
+    
+    def __init__(self, cost: float, version: str, state: Dict[str, Tuple],
+                 parent: Optional["_Label"] = None, upgrades: Optional[Dict[str, str]] = None):
+        self.cost = cost
+        self.version = version
+        # package -> version key it was raised to earlier on the path
+        self.state = state
+        self.parent = parent
+        self.upgrades = upgrades or {}
+        self.alive = True
+
+
 class UpgradeOptimizer:
     """Main class for codeep upgrade optimization."""
     
     def __init__(self):
+        # version -> {next_version: cost of that upgrade step}
         self.version_history = {}
+        # installed package -> version
         self.dependencies = {}
+        # version -> {package: constraint}, e.g. {"numpy": ">=1.24,<2.0"}
+        self.version_requirements = {}
+        self.current_version = "0.9.5"
+        self.dependency_upgrade_cost = 1.0
+        self._plans: Dict[Tuple[str, str], Optional[_Label]] = {}
         
     def optimize(self, target_version: str) -> Dict[str, Any]:
         """
@@ -24,16 +175,29 @@ class UpgradeOptimizer:
         """
         logger.info(f"Optimizing upgrade path to {target_version}")
         
-        # Basic implementation - will be enhanced with actual logic
-        result = {
-            "target_version": target_version,
-            "recommended_steps": [
+        plan = self.plan_upgrade(target_version)
+        if plan is None:
+            # No modelled path: fall back to the generic procedure
+            recommended_steps = [
                 f"Backup current configuration (v{self._get_current_version()})",
                 "Install required dependencies",
                 "Run compatibility checks",
                 "Execute upgrade procedure",
                 "Verify system functionality"
-            ],
+            ]
+        else:
+            recommended_steps = [f"Backup current configuration (v{self._get_current_version()})"]
+            for step in plan["steps"]:
+                for package, constraint in step["dependency_upgrades"].items():
+                    recommended_steps.append(f"Upgrade dependency {package} to {constraint}")
+                recommended_steps.append(f"Upgrade {step['from']} -> {step['to']}")
+            recommended_steps.append("Verify system functionality")
+        
+        result = {
+            "target_version": target_version,
+            "recommended_steps": recommended_steps,
+            "upgrade_path": plan["path"] if plan else [],
+            "estimated_cost": plan["cost"] if plan else None,
             "risks": [
                 "Potential downtime during upgrade",
                 "Dependency conflicts with existing packages",
@@ -51,22 +215,289 @@ class UpgradeOptimizer:
         return result
     
     def _get_current_version(self) -> str:
-        """Helper method to get current version (placeholder)."""
-        return "0.9.5"  # Placeholder value
+        """Helper method to get current version."""
+        return self.current_version
+    
+    def set_current_version(self, version: str) -> None:
+        """Set the version upgrades are planned from."""
+        self.current_version = version
     
     def add_dependency(self, package: str, version: str) -> None:
         """Add a dependency to the optimization process."""
         self.dependencies[package] = version
+        self._invalidate()
         logger.info(f"Added dependency: {package}=={version}")
+    
+    def add_upgrade_path(self, from_version: str, to_version: str, cost: float = 1.0) -> None:
+        """
+        Record that ``from_version`` can be upgraded directly to ``to_version``.
+        
+        Args:
+            from_version (str): Version the step starts from
+            to_version (str): Version the step ends at
+            cost (float): Relative effort or risk of the step (non-negative)
+        """
+        if cost < 0:
+            raise ValueError("Upgrade cost must be non-negative")
+        self.version_history.setdefault(from_version, {})[to_version] = cost
+        self.version_history.setdefault(to_version, {})
+        self._invalidate()
+    
+    def add_version_requirements(self, version: str, requirements: Dict[str, str]) -> None:
+        """
+        Record the dependency constraints a version needs installed.
+        
+        Args:
+            version (str): The codeep version
+            requirements (Dict[str, str]): Package -> constraint, e.g. {"numpy": ">=1.24"}
+        """
+        self.version_requirements.setdefault(version, {}).update(requirements)
+        self._invalidate()
+    
+    def _invalidate(self) -> None:
+        """Drop memoized paths after the graph or installed set changes."""
+        self._plans.clear()
+    
+    def _step_cost(
+        self, version: str, state: Dict[str, Tuple]
+    ) -> Optional[Tuple[float, Dict[str, str], Dict[str, Tuple]]]:
+        """
+        Get the extra cost of landing on ``version`` after earlier upgrades.
+        
+        Args:
+            version (str): The version being upgraded to
+            state: Version keys of the packages upgraded earlier on the path
+            
+        Returns:
+            (cost, dependency upgrades needed, package -> version key they
+            raise to), or None if a constraint conflicts
+        """
+        upgrades = {}
+        raised = {}
+        for package, constraint in self.version_requirements.get(version, {}).items():
+            current = state.get(package)
+            if current is None and package in self.dependencies:
+                current = _version_key(self.dependencies[package])
+            if current is None:
+                outcome, minimum = _check_key(_NOT_INSTALLED, constraint)
+                if outcome != "conflict":
+                    outcome = "upgrade"
+            else:
+                outcome, minimum = _check_key(current, constraint)
+            if outcome == "conflict":
+                return None
+            if outcome == "upgrade":
+                upgrades[package] = constraint
+                raised[package] = _NOT_INSTALLED if minimum is None else minimum
+        return len(upgrades) * self.dependency_upgrade_cost, upgrades, raised
+    
+    def _horizon(self) -> Tuple[Dict[str, int], Dict[str, List[Tuple[int, str]]], Set[str]]:
+        """
+        Get what the search needs to know about the requirements ahead of a version.
+        
+        Returns:
+            (position of each version in topological order, package ->
+            (position, constraint) for every version requiring it, packages
+            every constraint bounds only from below). A requirement is ahead
+            of a version when its position is greater; in a graph with cycles
+            every requirement counts as ahead of every version.
+        """
+        indegree = dict.fromkeys(self.version_history, 0)
+        for steps in self.version_history.values():
+            for next_version in steps:
+                indegree[next_version] += 1
+        ready = [version for version, count in indegree.items() if count == 0]
+        positions: Dict[str, int] = {}
+        while ready:
+            version = ready.pop()
+            positions[version] = len(positions)
+            for next_version in self.version_history[version]:
+                indegree[next_version] -= 1
+                if indegree[next_version] == 0:
+                    ready.append(next_version)
+        acyclic = len(positions) == len(indegree)
+        if not acyclic:
+            positions = dict.fromkeys(indegree, 0)
+        
+        mentions: Dict[str, List[Tuple[int, str]]] = {}
+        bounded = set()
+        for version, requirements in self.version_requirements.items():
+            ahead = positions.get(version, 0) if acyclic else 1
+            for package, constraint in requirements.items():
+                mentions.setdefault(package, []).append((ahead, constraint))
+                if any(op not in (">=", ">") for op, _ in _parse_constraint(constraint)[0]):
+                    bounded.add(package)
+        return positions, mentions, set(mentions) - bounded
+    
+    def _dominates(self, label: _Label, other: _Label, horizon: Tuple) -> bool:
+        """
+        Check that ``label`` can finish no dearer than ``other`` from the same version.
+        
+        A package only ever bounded from below is no worse off at a higher
+        version. Where ``label`` is behind on such a package, each
+        requirement still ahead that ``other`` already meets and ``label``
+        does not could charge one more upgrade, so that is taken off its
+        cost lead. Any other package must match exactly.
+        """
+        slack = other.cost - label.cost
+        if slack < 0:
+            return False
+        if label.state is other.state:
+            return True
+        positions, mentions, monotone = horizon
+        position = positions.get(label.version, 0)
+        for package in label.state.keys() | other.state.keys():
+            mine = label.state.get(package)
+            theirs = other.state.get(package)
+            if mine == theirs:
+                continue
+            if package not in monotone:
+                return False
+            # Raising only ever moves a package up from where it was
+            if theirs is None or (mine is not None and mine > theirs):
+                continue
+            if mine is None and package in self.dependencies:
+                mine = _version_key(self.dependencies[package])
+            for ahead, constraint in mentions[package]:
+                # Once both fail a requirement they are raised to the same minimum
+                if (
+                    ahead > position
+                    and _check_key(theirs, constraint)[0] == "ok"
+                    and (mine is None or _check_key(mine, constraint)[0] != "ok")
+                ):
+                    slack -= self.dependency_upgrade_cost
+            if slack < 0:
+                return False
+        return True
+    
+    def _search(self, source: str, target: str) -> Optional[_Label]:
+        """
+        Find the cheapest label reaching ``target`` and memoize it.
+        
+        Step costs and conflicts depend on the packages upgraded earlier on
+        the path, so the search runs over (version, carried packages) labels
+        rather than versions alone. Packages no requirement ahead mentions
+        are dropped from a label, and a label is dropped when another at the
+        same version is sure to finish no dearer, so the search stays exact
+        while skipping redundant states. Graphs whose routes upgrade many
+        unrelated packages can still need many labels per version.
+        """
+        key = (source, target)
+        if key in self._plans:
+            return self._plans[key]
+        
+        horizon = self._horizon()
+        positions, mentions, _ = horizon
+        last = {package: max(ahead for ahead, _ in found) for package, found in mentions.items()}
+        start = _Label(0.0, source, {})
+        labels: Dict[str, List[_Label]] = {source: [start]}
+        # The counter breaks cost ties without comparing labels
+        heap = [(0.0, 0, start)]
+        pushed = 1
+        found = None
+        while heap:
+            cost, _, label = heapq.heappop(heap)
+            if not label.alive:
+                continue
+            if label.version == target:
+                found = label
+                break
+            for next_version, step_cost in self.version_history.get(label.version, {}).items():
+                step = self._step_cost(next_version, label.state)
+                if step is None:
+                    continue
+                extra, upgrades, raised = step
+                position = positions.get(next_version, 0)
+                state = label.state
+                if raised or any(last[package] <= position for package in state):
+                    state = {
+                        package: version_key
+                        for package, version_key in {**state, **raised}.items()
+                        if last[package] > position
+                    }
+                new = _Label(cost + step_cost + extra, next_version, state, label, upgrades)
+                existing = labels.setdefault(next_version, [])
+                if any(self._dominates(other, new, horizon) for other in existing):
+                    continue
+                for other in existing:
+                    if self._dominates(new, other, horizon):
+                        other.alive = False
+                existing[:] = [other for other in existing if other.alive]
+                existing.append(new)
+                heapq.heappush(heap, (new.cost, pushed, new))
+                pushed += 1
+        
+        self._plans[key] = found
+        return found
+    
+    def plan_upgrade(self, target_version: str, current_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the cheapest upgrade path through the version graph.
+        
+        Each step costs its recorded upgrade cost plus ``dependency_upgrade_cost``
+        for every package that must be upgraded to satisfy the destination
+        version's constraints. Upgrades carry forward along the path, so each
+        package upgrade is paid for once. Versions whose constraints conflict
+        with the packages installed at that point are avoided.
+        
+        Args:
+            target_version (str): The version to reach
+            current_version (str, optional): Starting version, defaults to the current one
+            
+        Returns:
+            Dict with the version ``path``, total ``cost`` and per-hop ``steps``,
+            or None if the target is unreachable
+        """
+        source = current_version or self._get_current_version()
+        if source == target_version:
+            return {"path": [source], "cost": 0.0, "steps": []}
+        
+        label = self._search(source, target_version)
+        if label is None:
+            return None
+        
+        cost = label.cost
+        path = [target_version]
+        steps: List[Dict[str, Any]] = []
+        while label.parent is not None:
+            parent = label.parent.version
+            steps.append({
+                "from": parent,
+                "to": label.version,
+                "cost": self.version_history[parent][label.version],
+                "dependency_upgrades": label.upgrades,
+            })
+            path.append(parent)
+            label = label.parent
+        path.reverse()
+        steps.reverse()
+        return {"path": path, "cost": cost, "steps": steps}
         
     def get_compatibility_report(self, target_version: str) -> Dict[str, Any]:
         """Generate compatibility report for the target version."""
+        requirements = self.version_requirements.get(target_version, {})
+        compatible = []
+        incompatible = []
+        warnings = []
+        for package, version in self.dependencies.items():
+            constraint = requirements.get(package)
+            outcome = "ok" if constraint is None else _check_constraint(version, constraint)
+            if outcome == "conflict":
+                incompatible.append(package)
+            else:
+                compatible.append(package)
+                if outcome == "upgrade":
+                    warnings.append(f"{package} {version} must be upgraded to {constraint}")
+        for package, constraint in requirements.items():
+            if package not in self.dependencies:
+                warnings.append(f"{package} is not installed but required ({constraint})")
+        
         return {
             "target_version": target_version,
-            "compatible_dependencies": list(self.dependencies.keys()),
-            "incompatible_dependencies": [],
-            "warnings": []
+            "compatible_dependencies": compatible,
+            "incompatible_dependencies": incompatible,
+            "warnings": warnings
         }
 
 # Export instance for easy import
-upgrade_optimizer = UpgradeOptimizer()
\ No newline at end of file
+upgrade_optimizer = UpgradeOptimizer()
@@ -1,19 +1,77 @@
 """Tests for Codeep AI SDK"""
 
+import hashlib
+import io
+import json
+import os
+import stat
+import threading
+import time
+
 import pytest
+import requests
+from langchain_core.callbacks import BaseCallbackHandler
 from unittest.mock import Mock, patch
-from src.codeep import CodeepClient, CodeepLLM, Config
-from src.codeep.tasks import TaskClient
+from src.codeep import (
+    CancellationToken,
+    CircuitBreaker,
+    CircuitBreakers,
+    CodeepClient,
+    CodeepClientPool,
+    CodeepLLM,
+    CodeepMapReduce,
+    CodeepSession,
+    Config,
+    Deadline,
+    EndpointRouter,
+    HedgePolicy,
+    NearDuplicateCache,
+    RateLimiter,
+    TaskHistoryFrame,
+    load_task_history,
+    ResponseCache,
+    map_results,
+)
+from src.codeep import cli
+from src.codeep.bulk import run_bulk
+from src.codeep.journal import TaskJournal
+from src.codeep.session import DEFAULT_TIMEOUT
+from src.codeep.tasks import Task, TaskClient
 from src.codeep.exceptions import (
     AuthenticationError,
     TaskError,
     APIError,
     NetworkError,
+    QuotaExceededError,
     ValidationError,
     TaskTimeoutError,
+    TaskCancelledError,
 )
 
 
+def _task(task_id="t1", status="queued", **fields):
+    """Build a Task model"""
+    return Task(
+        task_id=task_id,
+        user_id=1,
+        prompt="p",
+        status=status,
+        created_at="2023-12-01T00:00:00Z",
+        updated_at="2023-12-01T00:00:00Z",
+        **fields,
+    )
+
+
+def _response(status_code=200, body=None, headers=None):
+    """Build a mock requests.Response"""
+    response = Mock()
+    response.status_code = status_code
+    response.raise_for_status.return_value = None
+    response.json.return_value = body
+    response.headers = headers or {}
+    return response
+
+
 class TestCodeepClient:
     """Test CodeepClient functionality"""
 
@@ -144,6 +202,19 @@ class TestConfig:
         # Reset
         Config.ENVIRONMENT = original_env
 
+    def test_config_base_urls(self):
+        """Test multiple base URL configuration"""
+        original_urls = Config.API_BASE_URLS
+
+        Config.set_base_urls(["https://eu.test.com/v1/", "https://us.test.com/v1"])
+        assert Config.get_base_urls() == ["https://eu.test.com/v1", "https://us.test.com/v1"]
+
+        Config.API_BASE_URLS = []
+        assert Config.get_base_urls() == [Config.get_base_url()]
+
+        # Reset
+        Config.API_BASE_URLS = original_urls
+
 
 class TestCodeepLLM:
     """Test LangChain LLM integration"""
@@ -204,5 +275,1251 @@ class TestCodeepLLM:
             self.llm._call("Test prompt")
 
 
+class TestTaskResultsStreaming:
+    """Test streaming task results to disk"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.session = Mock()
+        self.client = TaskClient("https://test.com/v1", session=self.session)
+        self.response = Mock()
+        self.response.raise_for_status.return_value = None
+        self.response.iter_content.return_value = [b"hello ", b"", b"world"]
+        self.session.get.return_value = self.response
+
+    def test_download_to_path_with_checksum(self, tmp_path):
+        """Test results are streamed to a file and hashed"""
+        target = tmp_path / "results.json"
+        info = self.client.download_task_results("t1", target, checksum="sha256")
+
+        assert target.read_bytes() == b"hello world"
+        assert info["bytes_written"] == 11
+        assert info["digest"] == hashlib.sha256(b"hello world").hexdigest()
+        self.session.get.assert_called_once_with(
+            "https://test.com/v1/tasks/tasks/t1/results", stream=True, headers=None
+        )
+        self.response.close.assert_called_once()
+
+    def test_downloaded_file_gets_default_mode(self, tmp_path):
+        """Test a downloaded file is not left readable by its owner only"""
+        target = tmp_path / "results.json"
+        self.client.download_task_results("t1", target)
+
+        umask = os.umask(0)
+        os.umask(umask)
+        assert stat.S_IMODE(os.stat(target).st_mode) == 0o666 & ~umask
+
+    def test_download_to_writable(self):
+        """Test results are streamed into a caller-supplied writable"""
+        buffer = io.BytesIO()
+        info = self.client.download_task_results("t1", buffer)
+
+        assert buffer.getvalue() == b"hello world"
+        assert info["path"] is None
+        assert info["digest"] is None
+
+    def test_checksum_mismatch_leaves_no_file(self, tmp_path):
+        """Test a bad digest raises and does not leave partial output"""
+        target = tmp_path / "results.json"
+        with pytest.raises(ValidationError):
+            self.client.download_task_results(
+                "t1", target, checksum="sha256", expected_digest="deadbeef"
+            )
+        assert list(tmp_path.iterdir()) == []
+
+    def test_overlapping_downloads_to_one_path(self, tmp_path):
+        """Test a second download to the same path does not corrupt the first"""
+        target = tmp_path / "results.json"
+
+        def first_chunks(chunk_size):
+            yield b"first "
+            self.client.download_task_results("t2", target)
+            yield b"download"
+
+        first = Mock()
+        first.raise_for_status.return_value = None
+        first.iter_content.side_effect = first_chunks
+        self.session.get.side_effect = [first, self.response]
+        self.client.download_task_results("t1", target)
+
+        assert target.read_bytes() == b"first download"
+        assert list(tmp_path.iterdir()) == [target]
+
+    def test_download_artifact(self, tmp_path):
+        """Test streaming a named artifact from result_urls"""
+        with patch.object(
+            self.client,
+            "get_task_results",
+            return_value={"result_urls": {"output.json": "https://files/output.json"}},
+        ):
+            self.client.download_task_results("t1", tmp_path / "out", artifact="output.json")
+            with pytest.raises(ValidationError):
+                self.client.download_task_results("t1", tmp_path / "x", artifact="missing")
+
+        # External artifact hosts must not receive the API bearer token
+        self.session.get.assert_called_once_with(
+            "https://files/output.json", stream=True, headers={"Authorization": None}
+        )
+
+    def test_download_artifact_on_api_host_keeps_auth(self, tmp_path):
+        """Test artifacts served by the API itself are fetched authenticated"""
+        url = "https://test.com/v1/tasks/tasks/t1/files/output.json"
+        with patch.object(self.client, "get_task_results",
+                          return_value={"result_urls": {"output.json": url}}):
+            self.client.download_task_results("t1", tmp_path / "out", artifact="output.json")
+
+        self.session.get.assert_called_once_with(url, stream=True, headers=None)
+
+    def test_artifact_request_drops_authorization_header(self):
+        """Test requests removes a None header so the token is not sent"""
+        session = requests.Session()
+        session.headers["Authorization"] = "Bearer secret"
+        prepared = session.prepare_request(
+            requests.Request("GET", "https://files/output.json", headers={"Authorization": None})
+        )
+        assert "Authorization" not in prepared.headers
+
+    def test_map_results(self, tmp_path):
+        """Test memory-mapped slicing of a results file"""
+        target = tmp_path / "results.txt"
+        target.write_bytes(b"0123456789")
+
+        with map_results(target) as mapped:
+            assert len(mapped) == 10
+            assert mapped[2:5] == b"234"
+            assert mapped.find(b"78") == 7
+
+        with map_results(target) as mapped:
+            view = mapped.view()
+            assert view[3:6] == b"345"
+        assert mapped._file.closed
+        assert bytes(view[-2:]) == b"89"
+        view.release()
+
+        empty = tmp_path / "empty.txt"
+        empty.write_bytes(b"")
+        with map_results(empty) as mapped:
+            assert len(mapped) == 0
+            assert mapped[:3] == b""
+
+
+class TestTaskJournal:
+    """Test crash-safe task journaling and recovery"""
+
+    def test_pending_survives_restart(self, tmp_path):
+        """Test unfinished tasks are recovered from the journal file"""
+        path = tmp_path / "tasks.journal"
+        journal = TaskJournal(path)
+        journal.record("a", "queued")
+        journal.record("b", "queued")
+        journal.record("a", "completed")
+
+        reloaded = TaskJournal(path)
+        assert reloaded.pending() == ["b"]
+        assert reloaded.status("a") == "completed"
+
+    def test_torn_line_is_ignored(self, tmp_path):
+        """Test a partially written final line does not break recovery"""
+        path = tmp_path / "tasks.journal"
+        TaskJournal(path).record("a", "queued")
+        with open(path, "a") as fh:
+            fh.write('{"task_id": "b", "sta')
+
+        journal = TaskJournal(path)
+        journal.record("c", "queued")
+        assert sorted(TaskJournal(path).pending()) == ["a", "c"]
+
+    def test_compaction_drops_finished_tasks(self, tmp_path):
+        """Test periodic compaction keeps only unfinished tasks"""
+        path = tmp_path / "tasks.journal"
+        journal = TaskJournal(path, compact_every=4)
+        journal.record("a", "queued")
+        journal.record("a", "completed")
+        journal.record("b", "queued")
+        journal.record("b", "processing")
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        assert TaskJournal(path).status("b") == "processing"
+
+    def test_client_journals_and_resumes(self, tmp_path):
+        """Test create_task and waits are journaled and resumable"""
+        journal = TaskJournal(tmp_path / "tasks.journal")
+        session = Mock()
+        client = TaskClient("https://test.com/v1", session=session, journal=journal)
+
+        session.post.return_value = _response(body={"task": _task("t1", "queued").model_dump()})
+        client.create_task("p")
+        assert journal.pending() == ["t1"]
+
+        # Simulate a restart with a fresh client sharing the journal
+        resumed = TaskClient(
+            "https://test.com/v1", session=Mock(), journal=TaskJournal(journal.path)
+        )
+        with patch.object(resumed, "get_task", return_value=_task("t1", "completed")):
+            finished = resumed.resume_pending(timeout=5, poll_interval=0)
+
+        assert finished["t1"].status == "completed"
+        assert TaskJournal(journal.path).pending() == []
+
+    def test_only_submitted_tasks_are_journaled(self, tmp_path):
+        """Test deleting or waiting on foreign tasks does not add journal entries"""
+        journal = TaskJournal(tmp_path / "tasks.journal")
+        session = Mock()
+        session.delete.return_value = _response(body={"msg": "deleted"})
+        client = TaskClient("https://test.com/v1", session=session, journal=journal)
+
+        client.delete_task("old")
+        with patch.object(client, "get_task", return_value=_task("other", "processing")):
+            with pytest.raises(TaskTimeoutError):
+                client.wait_for_completion("other", timeout=0.05, poll_interval=0.01)
+
+        assert journal.status("old") is None and journal.status("other") is None
+        assert not (tmp_path / "tasks.journal").exists()
+
+        session.post.return_value = _response(body={"task": _task("mine", "queued").model_dump()})
+        client.create_task("p")
+        client.delete_task("mine")
+        assert journal.status("mine") == "deleted"
+
+    def test_resume_continues_past_timeouts(self, tmp_path):
+        """Test one slow task does not stop the others from being reattached"""
+        journal = TaskJournal(tmp_path / "tasks.journal")
+        for task_id in ("slow", "gone", "done"):
+            journal.record(task_id, "queued")
+        client = TaskClient("https://test.com/v1", session=Mock(), journal=journal)
+
+        def wait(task_id, timeout, poll_interval):
+            if task_id == "slow":
+                raise TaskTimeoutError("still running")
+            if task_id == "gone":
+                raise requests.HTTPError("404", response=_response(status_code=404))
+            return _task(task_id, "completed")
+
+        with patch.object(client, "wait_for_completion", side_effect=wait):
+            finished = client.resume_pending(timeout=1, poll_interval=0)
+
+        assert list(finished) == ["done"]
+        assert journal.pending() == ["slow"]
+        assert journal.status("gone") == "deleted"
+
+
+class TestResponseCache:
+    """Test TTL and conditional-request caching"""
+
+    def test_fresh_entries_skip_round_trip(self):
+        """Test repeated calls within the TTL hit the cache"""
+        client = CodeepClient("https://test.com/v1", cache=ResponseCache())
+        with patch.object(client.auth.session, "get") as mock_get:
+            mock_get.return_value = _response(body={"remaining": 95})
+            assert client.get_quota()["remaining"] == 95
+            assert client.get_quota()["remaining"] == 95
+
+        mock_get.assert_called_once()
+        assert client.cache.stats["hits"] == 1
+
+    def test_expired_entries_revalidate_with_etag(self):
+        """Test expired entries send If-None-Match and accept a 304"""
+        cache = ResponseCache(ttls={"health": 0.0})
+        client = CodeepClient("https://test.com/v1", cache=cache)
+        with patch.object(client.auth.session, "get") as mock_get:
+            mock_get.side_effect = [
+                _response(body={"status": "healthy"}, headers={"ETag": '"v1"'}),
+                _response(status_code=304),
+            ]
+            client.health_check()
+            assert client.health_check() == {"status": "healthy"}
+
+        assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        assert cache.stats["not_modified"] == 1
+
+    def test_stale_while_revalidate_refreshes_in_background(self):
+        """Test stale values are served while a background refresh runs"""
+        cache = ResponseCache(ttls={"queue_status": 0.0}, stale_while_revalidate=60.0)
+        session = Mock()
+        session.get.side_effect = [
+            _response(body={"total_queued": 1}),
+            _response(body={"total_queued": 2}),
+        ]
+        url = "https://test.com/v1/tasks/queue/status"
+
+        assert cache.fetch("queue_status", session, url) == {"total_queued": 1}
+        assert cache.fetch("queue_status", session, url) == {"total_queued": 1}
+        for _ in range(100):
+            if session.get.call_count == 2 and not cache._refreshing:
+                break
+            time.sleep(0.01)
+        assert cache.stats["stale_served"] >= 1
+        assert cache.fetch("queue_status", session, url) == {"total_queued": 2}
+
+    def test_writes_invalidate_cached_entries(self):
+        """Test create_task invalidates quota and queue entries"""
+        client = CodeepClient("https://test.com/v1", cache=ResponseCache())
+        with patch.object(client.auth.session, "get") as mock_get, \
+                patch.object(client.tasks, "create_task"):
+            mock_get.return_value = _response(body={"remaining": 95})
+            client.get_quota()
+            client.create_task("prompt")
+            client.get_quota()
+
+        assert mock_get.call_count == 2
+
+    def test_llm_tasks_invalidate_cached_entries(self):
+        """Test tasks created through client.llm invalidate quota entries"""
+        client = CodeepClient("https://test.com/v1", cache=ResponseCache())
+        completed = _task(status="completed", result="ok")
+        with patch.object(client.auth.session, "get") as mock_get, \
+                patch.object(client.tasks, "create_task", return_value=_task()), \
+                patch.object(client.tasks, "wait_for_completion", return_value=completed):
+            mock_get.return_value = _response(body={"remaining": 95})
+            client.get_quota()
+            assert client.llm.invoke("prompt") == "ok"
+            client.get_quota()
+
+        assert mock_get.call_count == 2
+
+
+class TestEndpointRouting:
+    """Test multi-endpoint failover and latency-based routing"""
+
+    def test_ranked_prefers_lowest_latency_healthy(self):
+        """Test endpoints are ordered by latency with unhealthy ones last"""
+        router = EndpointRouter(["https://a", "https://b", "https://c"], failure_threshold=1)
+        router.record_success("https://a", 0.5)
+        router.record_success("https://b", 0.1)
+        router.record_success("https://c", 0.05)
+        router.record_failure("https://c")
+
+        assert router.ranked() == ["https://b", "https://a", "https://c"]
+        assert router.select() == "https://b"
+
+    def test_request_fails_over_to_next_endpoint(self):
+        """Test a connection error on one endpoint retries on the next"""
+        client = CodeepClient(base_urls=["https://a/v1", "https://b/v1"])
+        client.router.record_success("https://a/v1", 0.01)
+        client.router.record_success("https://b/v1", 0.02)
+
+        with patch("requests.Session.request") as mock_request:
+            mock_request.side_effect = [
+                requests.ConnectionError("down"),
+                _response(body={"status": "healthy"}),
+            ]
+            assert client.health_check() == {"status": "healthy"}
+
+        urls = [call.args[1] for call in mock_request.call_args_list]
+        assert urls == ["https://a/v1/health", "https://b/v1/health"]
+        assert client.router.status()[0]["failures"] == 1
+
+    def test_post_does_not_fail_over_after_send(self):
+        """Test non-idempotent requests are not replayed on read errors"""
+        client = CodeepClient(base_urls=["https://a/v1", "https://b/v1"])
+        with patch("requests.Session.request") as mock_request:
+            mock_request.side_effect = requests.ReadTimeout("slow")
+            with pytest.raises(requests.ReadTimeout):
+                client.tasks.create_task("prompt")
+
+        mock_request.assert_called_once()
+
+    def test_deadline_timeout_does_not_fail_over(self):
+        """Test running out of a Deadline neither retries nor marks endpoints down"""
+        client = CodeepClient(base_urls=["https://a/v1", "https://b/v1", "https://c/v1"])
+
+        def slow(method, url, timeout=None, **kwargs):
+            time.sleep(timeout)
+            raise requests.ReadTimeout("slow")
+
+        for _ in range(2):
+            with patch("requests.Session.request", side_effect=slow) as mock_request:
+                with pytest.raises(TaskTimeoutError):
+                    client.wait_for_completion("t1", poll_interval=1, deadline=Deadline(0.1))
+            mock_request.assert_called_once()
+            assert mock_request.call_args.kwargs["timeout"] <= 0.1
+
+        assert all(e["healthy"] and e["failures"] == 0 for e in client.router.status())
+
+    def test_probe_and_runtime_reconfiguration(self):
+        """Test probing marks endpoints down and set_endpoints keeps stats"""
+        router = EndpointRouter(["https://a", "https://b"])
+        with patch.object(router._probe_session, "get") as mock_get:
+            mock_get.side_effect = [
+                _response(body={"status": "healthy"}),
+                requests.ConnectionError("down"),
+            ]
+            assert router.probe() == {"https://a": True, "https://b": False}
+
+        router.set_endpoints(["https://b", "https://d/"])
+        status = {e["url"]: e for e in router.status()}
+        assert set(status) == {"https://b", "https://d"}
+        assert status["https://b"]["healthy"] is False
+        assert router.select() == "https://d"
+
+
+class TestRequestHedging:
+    """Test hedged GETs for tail-latency reduction"""
+
+    def _warm(self, policy, latency=0.01, count=20):
+        for _ in range(count):
+            policy.observe(latency)
+
+    def test_policy_applies_to_task_gets_only(self):
+        """Test only GETs for task details and results are eligible"""
+        policy = HedgePolicy()
+        assert policy.applies("GET", "https://a/v1/tasks/tasks/t1", {})
+        assert policy.applies("GET", "https://a/v1/tasks/tasks/t1/results", {})
+        assert not policy.applies("POST", "https://a/v1/tasks/tasks", {})
+        assert not policy.applies("GET", "https://a/v1/tasks/tasks/t1/results", {"stream": True})
+        assert not policy.applies("GET", "https://a/v1/auth/quota", {})
+
+    def test_no_hedge_until_enough_samples(self):
+        """Test hedging stays off until the latency window is warm"""
+        policy = HedgePolicy(min_samples=5)
+        self._warm(policy, count=4)
+        assert policy.hedge_delay() is None
+        policy.observe(0.2)
+        assert policy.hedge_delay() == 0.2
+
+    def test_slow_request_is_hedged_and_hedge_wins(self):
+        """Test a slow primary is raced by a hedge that answers first"""
+        policy = HedgePolicy(max_extra_load=1.0)
+        self._warm(policy)
+        session = CodeepSession(hedge_policy=policy)
+        slow, fast = _response(body={"who": "slow"}), _response(body={"who": "fast"})
+        calls = []
+
+        def fake_request(self_, method, url, *args, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                time.sleep(0.3)
+                return slow
+            return fast
+
+        with patch("requests.Session.request", fake_request):
+            response = session.get("https://a/v1/tasks/tasks/t1")
+            time.sleep(0.4)
+
+        assert response.json() == {"who": "fast"}
+        assert len(calls) == 2
+        slow.close.assert_called_once()
+        stats = policy.stats()
+        assert stats["hedges_fired"] == 1
+        assert stats["hedges_won"] == 1
+        session.close()
+
+    def test_extra_load_is_capped(self):
+        """Test no hedge fires once the extra-load budget is spent"""
+        policy = HedgePolicy(max_extra_load=0.0)
+        self._warm(policy)
+        session = CodeepSession(hedge_policy=policy)
+        threads = []
+
+        def fake_request(self_, method, url, *args, **kwargs):
+            threads.append(threading.current_thread())
+            time.sleep(0.05)
+            return _response(body={})
+
+        with patch("requests.Session.request", fake_request):
+            session.get("https://a/v1/tasks/tasks/t1")
+
+        assert policy.stats()["hedges_fired"] == 0
+        # Without hedge budget the request runs on the calling thread
+        assert threads == [threading.current_thread()]
+        session.close()
+
+    def test_failed_hedge_does_not_win(self):
+        """Test a fast 5xx loses to a slower successful response"""
+        policy = HedgePolicy(max_extra_load=1.0)
+        self._warm(policy)
+        session = CodeepSession(hedge_policy=policy)
+        ok, failing = _response(body={"who": "primary"}), _response(status_code=503)
+        threads = []
+
+        def fake_request(self_, method, url, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            if len(threads) == 1:
+                time.sleep(0.2)
+                return ok
+            return failing
+
+        with patch("requests.Session.request", fake_request):
+            response = session.get("https://a/v1/tasks/tasks/t1")
+
+        assert response is ok
+        failing.close.assert_called_once()
+        assert policy.stats()["hedges_fired"] == 1
+        assert policy.stats()["hedges_won"] == 0
+        # Only the hedge runs on the shared pool
+        assert not threads[0].startswith("codeep-hedge")
+        assert threads[1].startswith("codeep-hedge")
+        session.close()
+
+
+class TestCircuitBreaker:
+    """Test circuit breakers in the shared request path"""
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        """Test repeated failures open the circuit for that endpoint class"""
+        breakers = CircuitBreakers(failure_threshold=2, recovery_timeout=60)
+        client = CodeepClient("https://test.com/v1", circuit_breakers=breakers)
+
+        with patch("requests.Session.request") as mock_request:
+            mock_request.side_effect = requests.ConnectionError("down")
+            for _ in range(2):
+                with pytest.raises(requests.ConnectionError):
+                    client.get_task("t1")
+            with pytest.raises(NetworkError):
+                client.get_task("t1")
+
+        assert mock_request.call_count == 2
+        assert client.circuit_status()["tasks"]["state"] == "open"
+        assert client.circuit_status()["auth"]["state"] == "closed"
+
+    def test_recovers_through_health_probe(self):
+        """Test an open circuit probes /health and closes after a good trial"""
+        breakers = CircuitBreakers(failure_threshold=1, recovery_timeout=0)
+        client = CodeepClient("https://test.com/v1", circuit_breakers=breakers)
+        task_body = {"task": _task().model_dump()}
+
+        failing = _response(status_code=500)
+        failing.raise_for_status.side_effect = requests.HTTPError("500")
+        with patch("requests.Session.request") as mock_request:
+            mock_request.side_effect = [
+                failing,
+                _response(body={"status": "healthy"}),
+                _response(body=task_body),
+            ]
+            with pytest.raises(requests.HTTPError):
+                client.get_task("t1")
+            assert client.circuit_status()["tasks"]["state"] == "open"
+            assert client.get_task("t1").task_id == "t1"
+
+        probe_url = mock_request.call_args_list[1].args[1]
+        assert probe_url == "https://test.com/v1/health"
+        assert client.circuit_status()["tasks"]["state"] == "closed"
+
+    def test_caller_timeouts_and_other_errors_are_not_failures(self):
+        """Test only backend failures count towards opening the circuit"""
+        breakers = CircuitBreakers(failure_threshold=1, recovery_timeout=60)
+        client = CodeepClient("https://test.com/v1", circuit_breakers=breakers)
+
+        with patch("requests.Session.request") as mock_request:
+            mock_request.side_effect = requests.ReadTimeout("deadline")
+            for _ in range(2):
+                with pytest.raises(requests.ReadTimeout):
+                    client.get_task("t1", timeout=0.001)
+            mock_request.side_effect = KeyboardInterrupt
+            with pytest.raises(KeyboardInterrupt):
+                client.get_task("t1")
+
+        assert client.circuit_status()["tasks"]["state"] == "closed"
+        assert client.circuit_status()["tasks"]["failures"] == 0
+
+    def test_connect_timeouts_are_failures_and_default_timeout_applies(self):
+        """Test hung connections get a timeout and count towards the circuit"""
+        breakers = CircuitBreakers(failure_threshold=1, recovery_timeout=60)
+        client = CodeepClient("https://test.com/v1", circuit_breakers=breakers)
+
+        with patch("requests.Session.request") as mock_request:
+            mock_request.side_effect = requests.ConnectTimeout("no route")
+            with pytest.raises(requests.ConnectTimeout):
+                client.get_task("t1", timeout=5)
+            with pytest.raises(NetworkError):
+                client.get_task("t1")
+        assert client.circuit_status()["tasks"]["state"] == "open"
+
+        with patch("requests.Session.request") as mock_request:
+            mock_request.return_value = _response(body={"status": "healthy"})
+            client.health_check()
+        assert mock_request.call_args.kwargs["timeout"] == DEFAULT_TIMEOUT
+
+    def test_ignored_error_releases_half_open_trial(self):
+        """Test a non-failure exception frees the half-open trial slot"""
+        breaker = CircuitBreaker("tasks", failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        assert breaker.state == "half_open"
+        breaker.release()
+        breaker.before_call()
+
+    def test_failed_probe_keeps_circuit_open(self):
+        """Test an unhealthy probe keeps failing fast without calling the endpoint"""
+        breaker = CircuitBreaker("tasks", failure_threshold=1, recovery_timeout=0,
+                                 probe=lambda: False)
+        breaker.record_failure()
+        with pytest.raises(NetworkError):
+            breaker.before_call()
+        assert breaker.state == "open"
+
+
+class TestCodeepClientPool:
+    """Test spreading tasks across several accounts"""
+
+    def _client(self, remaining, task_id):
+        client = Mock(spec=CodeepClient)
+        client.base_url = "https://test.com/v1"
+        client.get_quota.return_value = {"remaining": remaining}
+        client.validate_quota.return_value = {"valid": True, "remaining": remaining}
+        client.create_task.return_value = _task(task_id)
+        return client
+
+    def _quota_spent(self, client):
+        """Make the client answer like an account whose daily quota is used up"""
+        client.validate_quota.return_value = {"valid": False, "msg": "Daily quota exceeded"}
+        return requests.HTTPError(
+            "429", response=_response(status_code=429, body={"msg": "Daily quota exceeded"})
+        )
+
+    def test_routes_to_most_remaining_quota_and_pins(self):
+        """Test tasks go to the account with most quota and stay pinned"""
+        low, high = self._client(5, "low-1"), self._client(50, "high-1")
+        pool = CodeepClientPool([low, high])
+
+        task = pool.create_task("prompt")
+        assert task.task_id == "high-1"
+        low.create_task.assert_not_called()
+
+        high.wait_for_completion.return_value = _task("high-1", "completed")
+        pool.wait_for_completion("high-1", timeout=10, poll_interval=1)
+        high.wait_for_completion.assert_called_once_with("high-1", 10, 1)
+        low.wait_for_completion.assert_not_called()
+        assert pool.stats()[1]["in_flight"] == 0
+
+    def test_in_flight_strategy_balances(self):
+        """Test the in_flight strategy alternates between idle accounts"""
+        a, b = self._client(10, "a-1"), self._client(10, "b-1")
+        pool = CodeepClientPool([a, b], strategy="in_flight")
+
+        pool.create_task("one")
+        pool.create_task("two")
+        assert a.create_task.call_count == 1
+        assert b.create_task.call_count == 1
+
+    def test_skips_exhausted_accounts(self):
+        """Test a 429 from a spent quota moves the task to the next account"""
+        a, b = self._client(10, "a-1"), self._client(5, "b-1")
+        a.create_task.side_effect = self._quota_spent(a)
+        pool = CodeepClientPool([a, b])
+
+        assert pool.create_task("prompt").task_id == "b-1"
+        assert pool.stats()[0]["remaining"] == 0
+
+        b.create_task.side_effect = self._quota_spent(b)
+        with pytest.raises(QuotaExceededError):
+            pool.create_task("prompt")
+        assert b.create_task.call_count == 2
+
+    def test_rate_limit_is_temporary(self):
+        """Test a 429 only sidelines an account until Retry-After passes"""
+        a, b = self._client(10, "a-1"), self._client(10, "b-1")
+        limited = requests.HTTPError(
+            "429", response=_response(status_code=429, headers={"Retry-After": "0.2"})
+        )
+        a.create_task.side_effect = [limited, _task("a-2")]
+        pool = CodeepClientPool([a, b], strategy="in_flight")
+
+        assert pool.create_task("one").task_id == "b-1"
+        assert pool.stats()[0]["remaining"] is None
+        time.sleep(0.25)
+        assert pool.create_task("two").task_id == "a-2"
+
+    def test_waits_when_every_account_is_rate_limited(self):
+        """Test the pool backs off instead of failing when all accounts are throttled"""
+        client = self._client(10, "t1")
+        limited = requests.HTTPError(
+            "429", response=_response(status_code=429, headers={"Retry-After": "0.05"})
+        )
+        client.create_task.side_effect = [limited, _task("t1")]
+        pool = CodeepClientPool([client])
+
+        assert pool.create_task("prompt").task_id == "t1"
+        assert client.create_task.call_count == 2
+
+    def test_exhausted_accounts_refresh_under_in_flight(self):
+        """Test quota-exhausted accounts come back after quota_refresh"""
+        a, b = self._client(10, "a-1"), self._client(10, "b-1")
+        a.create_task.side_effect = [self._quota_spent(a), _task("a-2")]
+        pool = CodeepClientPool([a, b], strategy="in_flight", quota_refresh=0)
+
+        assert pool.create_task("one").task_id == "b-1"
+        assert pool.stats()[0]["remaining"] == 0
+        assert pool.create_task("two").task_id == "a-2"
+        a.get_quota.assert_called()
+        b.get_quota.assert_not_called()
+
+    def test_abandoned_waits_release_in_flight(self):
+        """Test a wait that times out or is cancelled frees the account's slot"""
+        client = self._client(10, "t1")
+        pool = CodeepClientPool([client], strategy="in_flight")
+        for error in (TaskTimeoutError("slow"), TaskCancelledError("stop")):
+            pool.create_task("prompt")
+            client.wait_for_completion.side_effect = error
+            with pytest.raises(type(error)):
+                pool.wait_for_completion("t1", cancel_remote="delete")
+            assert pool.stats()[0]["in_flight"] == 0
+        assert pool._owners == {} and pool._active == set()
+
+    def test_finished_tasks_are_unpinned(self):
+        """Test pins are dropped once a task finishes and found again on demand"""
+        client = self._client(10, "t1")
+        client.get_task.return_value = _task("t1", "completed")
+        pool = CodeepClientPool([client])
+
+        pool.create_task("prompt")
+        pool.get_task("t1")
+        assert pool._owners == {}
+        assert pool.client_for("t1") is client
+
+    def test_open_circuit_on_quota_check_does_not_fail_submit(self):
+        """Test a NetworkError reading quota keeps routing on the last value"""
+        client = self._client(10, "t1")
+        client.get_quota.side_effect = NetworkError("Circuit open", 503)
+        pool = CodeepClientPool([client])
+
+        assert pool.create_task("prompt").task_id == "t1"
+
+    def test_backs_codeep_llm(self):
+        """Test the pool can be used as the CodeepLLM client"""
+        client = self._client(10, "t1")
+        completed = _task("t1", "completed")
+        completed.result = "pooled result"
+        client.wait_for_completion.return_value = completed
+        pool = CodeepClientPool([client])
+
+        assert pool.llm._call("prompt") == "pooled result"
+
+
+class TestCodeepMapReduce:
+    """Test parallel map-reduce over large inputs"""
+
+    def _llm(self, respond):
+        llm = CodeepLLM(client=Mock(spec=TaskClient))
+        object.__setattr__(llm, "_call", Mock(side_effect=lambda prompt, **kwargs: respond(prompt)))
+        return llm
+
+    def test_split_prefers_breaks_and_overlaps(self):
+        """Test chunks stay within size and break on paragraph boundaries"""
+        text = "alpha beta gamma.\n\n" * 20
+        mr = CodeepMapReduce(self._llm(str), chunk_size=100, chunk_overlap=10)
+        chunks = mr.split(text)
+
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert all(chunk.endswith("\n\n") for chunk in chunks[:-1])
+        assert "".join(chunks).count("alpha") >= 20
+
+    def test_run_maps_in_parallel_and_reduces(self):
+        """Test map results stream back and are reduced in chunk order"""
+        def respond(prompt):
+            if prompt.startswith("REDUCE"):
+                return "reduced:" + prompt
+            return prompt.upper()
+
+        mr = CodeepMapReduce(
+            self._llm(respond),
+            chunk_size=10,
+            chunk_overlap=0,
+            map_prompt="{chunk}",
+            reduce_prompt="REDUCE {results}",
+        )
+        streamed = list(mr.iter_map("aaaa bbbb cccc dddd"))
+        assert sorted(index for index, _ in streamed) == [0, 1]
+
+        result = mr.run("aaaa bbbb cccc dddd")
+        assert result.startswith("reduced:REDUCE AAAA BBBB ")
+        assert result.index("AAAA") < result.index("CCCC")
+
+    def test_failed_map_task_raises(self):
+        """Test a failing chunk raises instead of being reduced as an empty string"""
+        mock_client = Mock(spec=TaskClient)
+
+        def create_task(prompt, toolset=None):
+            if "bbbb" in prompt:
+                raise TaskError("create failed")
+            return _task()
+
+        mock_client.create_task.side_effect = create_task
+        mock_client.wait_for_completion.return_value = _task(status="completed", result="ok")
+        mr = CodeepMapReduce(CodeepLLM(client=mock_client), chunk_size=10, chunk_overlap=0)
+
+        with pytest.raises(TaskError):
+            mr.run("aaaa bbbb cccc dddd")
+
+    def test_map_calls_run_through_callbacks(self):
+        """Test map tasks reach LangChain callbacks and failures are reported"""
+        events = []
+
+        class Recorder(BaseCallbackHandler):
+            def on_llm_start(self, serialized, prompts, **kwargs):
+                events.append("start")
+
+            def on_llm_error(self, error, **kwargs):
+                events.append("error")
+
+        llm = self._llm(lambda prompt: prompt.upper())
+        llm.callbacks = [Recorder()]
+        mr = CodeepMapReduce(llm, chunk_size=10, chunk_overlap=0)
+        assert [result for _, result in mr.iter_map("aaaa bbbb")] == ["AAAA BBBB"]
+        assert events == ["start"]
+
+        object.__setattr__(llm, "_call", Mock(side_effect=TaskError("boom")))
+        with pytest.raises(TaskError):
+            llm.complete("prompt")
+        assert events == ["start", "start", "error"]
+
+    def test_tree_reduce(self):
+        """Test tree reduction only combines reduce_fanout results at a time"""
+        prompts = []
+
+        def respond(prompt):
+            prompts.append(prompt)
+            return "r"
+
+        mr = CodeepMapReduce(self._llm(respond), reduce_prompt="{results}", reduce_fanout=2)
+        assert mr.reduce(["a", "b", "c", "d", "e"]) == "r"
+
+        reduce_sizes = sorted(p.count("---") + 1 for p in prompts)
+        assert max(reduce_sizes) == 2
+        assert len(prompts) == 4
+
+
+class TestCli:
+    """Test the bulk submission command line interface"""
+
+    def test_read_prompts_accepts_jsonl_and_text(self):
+        """Test prompt records get IDs and bare lines become prompts"""
+        records = list(cli.read_prompts(io.StringIO('{"id": 7, "prompt": "a"}\n\nplain text\n')))
+        assert records == [{"id": "7", "prompt": "a"}, {"prompt": "plain text", "id": "3"}]
+
+    def test_run_streams_results_and_skips_checkpointed(self, tmp_path):
+        """Test results are appended as JSONL and completed IDs are skipped on rerun"""
+        source = tmp_path / "prompts.jsonl"
+        source.write_text('{"id": "a", "prompt": "one"}\n{"id": "b", "prompt": "two"}\n')
+        output = tmp_path / "results.jsonl"
+        output.write_text(json.dumps({"id": "a", "status": "completed"}) + "\n")
+
+        with patch("src.codeep.cli.CodeepClient") as client_cls:
+            client = client_cls.return_value
+            client.create_task.return_value = _task("t-b")
+            client.wait_for_completion.return_value = _task("t-b", "completed", result="done")
+            code = cli.main(["run", str(source), "-o", str(output), "--token", "tok", "-q"])
+
+        assert code == 0
+        client.set_token.assert_called_once_with("tok")
+        client.create_task.assert_called_once_with("two", None)
+        lines = [json.loads(line) for line in output.read_text().splitlines()]
+        assert lines[-1]["id"] == "b"
+        assert lines[-1]["result"] == "done"
+
+    def test_rerun_reattaches_to_unfinished_tasks(self, tmp_path):
+        """Test IDs whose task never finished are reattached instead of resubmitted"""
+        source = tmp_path / "prompts.jsonl"
+        source.write_text("one\ntwo\nthree\n")
+        output = tmp_path / "results.jsonl"
+        output.write_text(
+            json.dumps({"id": "1", "task_id": "t-1", "status": "pending"}) + "\n"
+            + json.dumps({"id": "2", "task_id": "t-2", "status": "completed"}) + "\n"
+        )
+
+        with patch("src.codeep.cli.CodeepClient") as client_cls:
+            client = client_cls.return_value
+            client.create_task.return_value = _task("t-3")
+            client.wait_for_completion.return_value = _task(status="completed", result="ok")
+            code = cli.main(["run", str(source), "-o", str(output), "--token", "tok", "-q"])
+
+        assert code == 0
+        client.create_task.assert_called_once_with("three", None)
+        waited = sorted(call.args[0] for call in client.wait_for_completion.call_args_list)
+        assert waited == ["t-1", "t-3"]
+
+    def test_client_timeout_is_recorded_as_pending(self, tmp_path):
+        """Test a task that outlives the wait keeps its task_id for the next run"""
+        source = tmp_path / "prompts.jsonl"
+        source.write_text("one\n")
+        output = tmp_path / "results.jsonl"
+
+        with patch("src.codeep.cli.CodeepClient") as client_cls:
+            client = client_cls.return_value
+            client.create_task.return_value = _task("t-1")
+            client.wait_for_completion.side_effect = TaskTimeoutError("too slow")
+            code = cli.main(["run", str(source), "-o", str(output), "--token", "tok", "-q"])
+
+        assert code == 1
+        record = json.loads(output.read_text().splitlines()[-1])
+        assert (record["task_id"], record["status"]) == ("t-1", "pending")
+        assert cli.load_checkpoint(str(output)) == (set(), {"1": "t-1"})
+
+    def test_created_tasks_are_checkpointed_before_the_wait(self, tmp_path):
+        """Test a task_id reaches the output as soon as its task is created"""
+        source = tmp_path / "prompts.jsonl"
+        source.write_text("one\n")
+        output = tmp_path / "results.jsonl"
+
+        def wait_for_completion(task_id, **kwargs):
+            # A crash here must leave enough behind to reattach on the next run
+            assert cli.load_checkpoint(str(output)) == (set(), {"1": "t-1"})
+            return _task(task_id, "completed", result="ok")
+
+        with patch("src.codeep.cli.CodeepClient") as client_cls:
+            client = client_cls.return_value
+            client.create_task.return_value = _task("t-1")
+            client.wait_for_completion.side_effect = wait_for_completion
+            code = cli.main(["run", str(source), "-o", str(output), "--token", "tok", "-q"])
+
+        assert code == 0
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [record["status"] for record in records] == ["pending", "completed"]
+        assert cli.load_checkpoint(str(output)) == ({"1"}, {})
+
+    def test_input_errors_are_reported_cleanly(self, tmp_path, capsys):
+        """Test a missing file or prompt field prints an error instead of a traceback"""
+        output = str(tmp_path / "results.jsonl")
+        missing = str(tmp_path / "missing.jsonl")
+        assert cli.main(["run", missing, "-o", output, "--token", "tok", "-q"]) == 2
+        assert "error:" in capsys.readouterr().err
+
+        source = tmp_path / "prompts.jsonl"
+        source.write_text('{"id": "a"}\n')
+        with patch("src.codeep.cli.CodeepClient"):
+            assert cli.main(["run", str(source), "-o", output, "--token", "tok", "-q"]) == 2
+        assert "has no 'prompt' field" in capsys.readouterr().err
+
+    def test_failed_records_do_not_stop_the_run(self, tmp_path):
+        """Test a failing prompt is recorded and the exit code reflects it"""
+        source = tmp_path / "prompts.jsonl"
+        source.write_text("one\ntwo\n")
+        output = tmp_path / "results.jsonl"
+
+        with patch("src.codeep.cli.CodeepClient") as client_cls:
+            client = client_cls.return_value
+            client.create_task.side_effect = [TaskError("boom"), _task("t2")]
+            client.wait_for_completion.return_value = _task("t2", "completed", result="ok")
+            code = cli.main(["run", str(source), "-o", str(output), "--token", "tok", "-q"])
+
+        assert code == 1
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        latest = {record["id"]: record["status"] for record in records}
+        assert sorted(latest.values()) == ["completed", "failed"]
+
+
+class TestCancellation:
+    """Test cancellable waits and deadline propagation"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.client = TaskClient("https://test.com/v1", session=Mock())
+
+    def test_cancel_token_stops_wait_and_deletes_remote_task(self):
+        """Test cancelling ends the wait and deletes the abandoned task"""
+        token = CancellationToken()
+        threading.Timer(0.05, token.cancel).start()
+
+        with patch.object(self.client, "get_task", return_value=_task(status="processing")), \
+                patch.object(self.client, "delete_task") as mock_delete:
+            start = time.monotonic()
+            with pytest.raises(TaskCancelledError):
+                self.client.wait_for_completion(
+                    "t1", timeout=30, poll_interval=10, cancel_token=token, cancel_remote="delete"
+                )
+
+        assert time.monotonic() - start < 5
+        mock_delete.assert_called_once_with("t1")
+
+    def test_deadline_bounds_each_request(self):
+        """Test request timeouts never exceed the time left on the deadline"""
+        deadline = Deadline(0.2)
+        with patch.object(self.client, "get_task", return_value=_task(status="queued")) as mock_get, \
+                patch.object(self.client, "update_task") as mock_update:
+            with pytest.raises(TaskTimeoutError):
+                self.client.wait_for_completion(
+                    "t1", timeout=300, poll_interval=0.05, deadline=deadline, cancel_remote="update"
+                )
+
+        assert all(call.kwargs["timeout"] <= 0.2 for call in mock_get.call_args_list)
+        mock_update.assert_called_once_with("t1", status="cancelled")
+
+    def test_invalid_cancel_remote(self):
+        """Test unknown cancel_remote modes are rejected"""
+        with pytest.raises(ValidationError):
+            self.client.wait_for_completion("t1", cancel_remote="kill")
+
+    def test_llm_propagates_token_and_deadline(self):
+        """Test CodeepLLM passes cancellation and deadlines to the task client"""
+        mock_client = Mock(spec=TaskClient)
+        mock_client.create_task.return_value = _task(status="queued")
+        completed = _task(status="completed")
+        completed.result = "ok"
+        mock_client.wait_for_completion.return_value = completed
+        llm = CodeepLLM(client=mock_client, cancel_remote="delete")
+        token, deadline = CancellationToken(), Deadline(60)
+
+        assert llm._call("prompt", cancel_token=token, deadline=deadline) == "ok"
+        assert mock_client.create_task.call_args.kwargs["timeout"] <= 60
+        wait_kwargs = mock_client.wait_for_completion.call_args.kwargs
+        assert wait_kwargs["cancel_token"] is token
+        assert wait_kwargs["deadline"] is deadline
+        assert wait_kwargs["cancel_remote"] == "delete"
+
+        token.cancel()
+        with pytest.raises(TaskCancelledError):
+            llm._call("prompt", cancel_token=token)
+
+    def test_invoke_surfaces_cancellation_and_timeouts(self):
+        """Test the public LangChain API does not swallow cancellation or deadlines"""
+        mock_client = Mock(spec=TaskClient)
+        llm = CodeepLLM(client=mock_client)
+        token = CancellationToken()
+        token.cancel()
+
+        with pytest.raises(TaskCancelledError):
+            llm.invoke("prompt", cancel_token=token)
+        with pytest.raises(TaskCancelledError):
+            list(llm.stream("prompt", cancel_token=token))
+        mock_client.create_task.assert_not_called()
+
+        mock_client.create_task.return_value = _task()
+        mock_client.wait_for_completion.side_effect = TaskTimeoutError("deadline passed")
+        with pytest.raises(TaskTimeoutError):
+            llm.invoke("prompt", deadline=Deadline(0.01))
+        # Without a token or deadline, invoke keeps returning "" on timeout
+        assert llm.invoke("prompt") == ""
+
+    def test_llm_expired_deadline_creates_no_task(self):
+        """Test an expired deadline fails before creating a task it would orphan"""
+        mock_client = Mock(spec=TaskClient)
+        llm = CodeepLLM(client=mock_client)
+
+        with pytest.raises(TaskTimeoutError):
+            llm.invoke("prompt", deadline=Deadline(0))
+        mock_client.create_task.assert_not_called()
+
+        mock_client.create_task.side_effect = requests.ReadTimeout("slow")
+        with pytest.raises(TaskTimeoutError):
+            llm.invoke("prompt", deadline=Deadline(60))
+
+
+class TestBulkOperations:
+    """Test concurrent bulk task operations"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.client = TaskClient("https://test.com/v1", session=Mock(), rate_limit=None)
+
+    def _http_error(self, status_code, headers=None):
+        response = Mock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        return requests.HTTPError(f"{status_code} error", response=response)
+
+    def test_bulk_delete_continues_past_failures(self):
+        """Test each ID gets an outcome even when some deletes fail"""
+        def delete(task_id):
+            if task_id == "missing":
+                raise self._http_error(404)
+            return {"message": "Task deleted successfully"}
+
+        progress = []
+        with patch.object(self.client, "delete_task", side_effect=delete):
+            results = self.client.bulk_delete_tasks(
+                ["a", "missing", "b"],
+                progress=lambda done, total, result: progress.append((done, total)),
+            )
+
+        assert results["a"].ok and results["b"].ok
+        assert not results["missing"].ok
+        assert results["missing"].status_code == 404
+        assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+
+    def test_rate_limited_calls_are_retried(self):
+        """Test 429 responses back off using Retry-After and retry"""
+        calls = []
+
+        def get(task_id):
+            calls.append(task_id)
+            if len(calls) == 1:
+                raise self._http_error(429, {"Retry-After": "0"})
+            return "task"
+
+        with patch.object(self.client, "get_task", side_effect=get):
+            results = self.client.get_tasks(["a"])
+
+        assert results["a"].ok
+        assert results["a"].value == "task"
+        assert len(calls) == 2
+
+    def test_negative_max_retries_rejected(self):
+        """Test a negative retry count is rejected before any request"""
+        operation = Mock()
+        with pytest.raises(ValidationError):
+            run_bulk(operation, [("a", None)], max_retries=-1)
+        operation.assert_not_called()
+
+    def test_bulk_update_passes_fields(self):
+        """Test per-ID update fields are forwarded"""
+        with patch.object(self.client, "update_task") as mock_update:
+            self.client.bulk_update_tasks({"a": {"status": "failed"}})
+        mock_update.assert_called_once_with("a", status="failed")
+
+    def test_bulk_calls_share_the_client_limiter(self):
+        """Test concurrent bulk calls draw from one limiter per client"""
+        limiter = Mock(spec=RateLimiter)
+        self.client.rate_limiter = limiter
+        with patch.object(self.client, "get_task"), patch.object(self.client, "delete_task"):
+            calls = [
+                threading.Thread(target=self.client.get_tasks, args=(["a", "b"],)),
+                threading.Thread(target=self.client.bulk_delete_tasks, args=(["c", "d", "e"],)),
+            ]
+            for thread in calls:
+                thread.start()
+            for thread in calls:
+                thread.join()
+
+        assert limiter.acquire.call_count == 5
+        assert CodeepClient("https://test.com/v1").tasks.rate_limiter is not None
+
+    def test_rate_limiter_spaces_requests(self):
+        """Test the token bucket holds callers to the configured rate"""
+        limiter = RateLimiter(per_minute=600, burst=1)
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.acquire()
+        assert time.monotonic() - start >= 0.18
+
+
+class TestTaskHistoryAnalytics:
+    """Test columnar task-history analytics"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.np = pytest.importorskip("numpy")
+        self.records = [
+            {"task_id": "a", "status": "completed", "prompt": "abcd",
+             "created_at": "2023-12-01T00:00:00Z", "started_at": "2023-12-01T00:00:10Z",
+             "completed_at": "2023-12-01T00:00:40Z"},
+            {"task_id": "b", "status": "completed", "prompt": "ab",
+             "created_at": "2023-12-01T01:00:00+01:00", "started_at": "2023-12-01T00:00:05Z",
+             "completed_at": "2023-12-01T00:00:15.500Z"},
+            {"task_id": "c", "status": "failed", "prompt": "",
+             "created_at": "2023-12-02T12:00:00Z", "started_at": None, "completed_at": None},
+            {"task_id": "d", "status": "mystery", "prompt": "x",
+             "created_at": "2023-12-02T13:00:00Z"},
+        ]
+        self.frame = TaskHistoryFrame.from_records(self.records)
+
+    def test_columns(self):
+        """Test records become typed column arrays"""
+        assert len(self.frame) == 4
+        assert self.frame.created_at[0] == 1701388800
+        # +01:00 offsets are converted to UTC
+        assert self.frame.created_at[1] == 1701388800
+        assert self.frame.prompt_length.tolist() == [4, 2, 0, 1]
+        assert self.frame.duration[0] == 30.0
+        assert self.np.isnan(self.frame.duration[2])
+
+    def test_group_by_status(self):
+        """Test vectorized per-status aggregation skips missing values"""
+        assert self.frame.status_counts()["completed"] == 2
+        assert self.frame.status_counts()["unknown"] == 1
+        report = self.frame.group_by_status("duration")
+        assert set(report) == {"completed"}
+        assert report["completed"]["count"] == 2
+        assert report["completed"]["mean"] == 20.0
+        assert report["completed"]["max"] == 30.0
+
+    def test_time_buckets(self):
+        """Test daily bucketing with per-status counts and column means"""
+        buckets = self.frame.time_buckets("day", column="prompt_length")
+        assert buckets["bucket_start"].tolist() == [1701388800, 1701475200]
+        assert buckets["total"].tolist() == [2, 2]
+        assert buckets["completed"].tolist() == [2, 0]
+        assert buckets["failed"].tolist() == [0, 1]
+        assert buckets["mean"].tolist() == [3.0, 0.5]
+
+    def test_load_task_history_paginates(self):
+        """Test history pages are fetched until the last page"""
+        client = Mock()
+        client.get_task_history.side_effect = [
+            {"tasks": self.records[:2], "pagination": {"pages": 2}},
+            {"tasks": self.records[2:], "pagination": {"pages": 2}},
+        ]
+        frame = load_task_history(client, status="completed")
+
+        assert len(frame) == 4
+        assert client.get_task_history.call_count == 2
+        assert client.get_task_history.call_args.kwargs["page"] == 2
+
+
+class TestNearDuplicateCache:
+    """Test near-duplicate prompt detection"""
+
+    PROMPT = (
+        "You are a helpful assistant. Write a Python function that parses a CSV "
+        "file, skips the header row, and returns the sum of the third column as "
+        "a float. Include type hints and a docstring."
+    )
+
+    def test_whitespace_variants_are_exact_hits(self):
+        """Test prompts that differ only in whitespace hit exactly"""
+        cache = NearDuplicateCache()
+        cache.store(self.PROMPT, "result", latency=12.0)
+
+        assert cache.lookup("  " + self.PROMPT.replace(" ", "\n  ")) == "result"
+        assert cache.stats()["exact_hits"] == 1
+        assert cache.stats()["seconds_saved"] == 12.0
+
+    def test_near_duplicates_hit_and_different_prompts_miss(self):
+        """Test small edits hit while unrelated prompts miss"""
+        cache = NearDuplicateCache(threshold=0.8)
+        cache.store(self.PROMPT, "result", latency=5.0)
+
+        assert cache.lookup(self.PROMPT + " Thanks!") == "result"
+        assert cache.lookup("Summarize the quarterly sales report for the board.") is None
+        stats = cache.stats()
+        assert stats["near_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["tasks_saved"] == 1
+
+    def test_context_partitions_entries(self):
+        """Test results are not shared across toolsets"""
+        cache = NearDuplicateCache()
+        cache.store(self.PROMPT, "with tools", context=["python"])
+        assert cache.lookup(self.PROMPT) is None
+        assert cache.lookup(self.PROMPT, context=["python"]) == "with tools"
+
+    def test_eviction_respects_max_entries(self):
+        """Test the oldest entries are evicted past max_entries"""
+        cache = NearDuplicateCache(max_entries=2)
+        for i in range(3):
+            cache.store(f"prompt number {i} about topic {i}", str(i))
+        assert len(cache) == 2
+        assert cache.lookup("prompt number 0 about topic 0") is None
+
+    def test_numpy_and_python_signatures_match(self):
+        """Test the vectorized MinHash gives the pure-Python signature"""
+        cache = NearDuplicateCache()
+        prompt = " ".join(f"word{i % 97} token{i % 31}" for i in range(5000))
+        vectorized = cache.signature(prompt)
+        with patch("src.codeep.dedup.np", None):
+            assert cache.signature(prompt) == vectorized
+
+    def test_store_reuses_miss_signature(self):
+        """Test a miss followed by store computes the signature once"""
+        cache = NearDuplicateCache()
+        with patch.object(cache, "signature", wraps=cache.signature) as mock_signature:
+            assert cache.lookup(self.PROMPT) is None
+            cache.store(self.PROMPT, "result")
+            assert cache.lookup(self.PROMPT + " Thanks!") == "result"
+        assert mock_signature.call_count == 2
+
+    def test_llm_serves_cached_results(self):
+        """Test CodeepLLM skips task creation on a cache hit"""
+        mock_client = Mock(spec=TaskClient)
+        mock_client.create_task.return_value = Mock(task_id="t1")
+        completed = Mock(status="completed", result="answer END extra")
+        mock_client.wait_for_completion.return_value = completed
+        llm = CodeepLLM(client=mock_client, prompt_cache=NearDuplicateCache())
+
+        assert llm._call(self.PROMPT, stop=["END"]) == "answer "
+        assert llm._call(self.PROMPT + "\n") == "answer END extra"
+        mock_client.create_task.assert_called_once()
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -1,5 +1,7 @@
+import time
+
 import pytest
-from codeep_upgrade import upgrade_optimizer
+from codeep_upgrade import UpgradeOptimizer, upgrade_optimizer
 
 def test_optimize_basic():
     """Test basic optimization functionality."""
@@ -33,4 +35,144 @@ def test_compatibility_report():
     
     assert report["target_version"] == "v2.1.0"
     assert "requests" in report["compatible_dependencies"]
-    assert len(report["incompatible_dependencies"]) == 0
\ No newline at end of file
+    assert len(report["incompatible_dependencies"]) == 0
+
+def _graph_optimizer():
+    optimizer = UpgradeOptimizer()
+    optimizer.set_current_version("1.0")
+    optimizer.add_upgrade_path("1.0", "1.5", cost=1.0)
+    optimizer.add_upgrade_path("1.5", "2.0", cost=1.0)
+    optimizer.add_upgrade_path("1.0", "2.0", cost=5.0)
+    return optimizer
+
+def test_plan_upgrade_cheapest_path():
+    """Test that the planner picks the cheapest multi-hop path."""
+    optimizer = _graph_optimizer()
+    plan = optimizer.plan_upgrade("2.0")
+    
+    assert plan["path"] == ["1.0", "1.5", "2.0"]
+    assert plan["cost"] == 2.0
+    assert optimizer.plan_upgrade("3.0") is None
+
+def test_plan_upgrade_dependency_constraints():
+    """Test that dependency upgrades add cost and conflicts block versions."""
+    optimizer = _graph_optimizer()
+    optimizer.add_dependency("numpy", "1.21.0")
+    optimizer.add_version_requirements("1.5", {"numpy": ">=1.24,<2.0"})
+    optimizer.dependency_upgrade_cost = 4.0
+    assert optimizer.plan_upgrade("2.0")["path"] == ["1.0", "2.0"]
+    
+    optimizer.add_version_requirements("2.0", {"numpy": "<1.20"})
+    assert optimizer.plan_upgrade("2.0") is None
+    report = optimizer.get_compatibility_report("2.0")
+    assert report["incompatible_dependencies"] == ["numpy"]
+
+def test_optimize_uses_upgrade_path():
+    """Test that optimize turns the planned path into recommended steps."""
+    optimizer = _graph_optimizer()
+    optimizer.add_dependency("requests", "2.20.0")
+    optimizer.add_version_requirements("1.5", {"requests": ">=2.31"})
+    result = optimizer.optimize("2.0")
+    
+    assert result["upgrade_path"] == ["1.0", "1.5", "2.0"]
+    assert result["estimated_cost"] == 3.0
+    assert "Upgrade dependency requests to >=2.31" in result["recommended_steps"]
+    assert "Upgrade 1.5 -> 2.0" in result["recommended_steps"]
+
+def test_pre_releases_sort_before_final_release():
+    """Test rc installs are checked against bounds on the final release."""
+    optimizer = UpgradeOptimizer()
+    optimizer.add_dependency("numpy", "2.0rc1")
+    optimizer.add_version_requirements("1.5", {"numpy": "<2.0"})
+    optimizer.add_version_requirements("2.0", {"numpy": ">=2.0"})
+    optimizer.add_version_requirements("2.1", {"numpy": ">=2.0.0rc1,<2.0.post1"})
+    
+    report = optimizer.get_compatibility_report("1.5")
+    assert report["compatible_dependencies"] == ["numpy"]
+    assert report["warnings"] == []
+    
+    report = optimizer.get_compatibility_report("2.0")
+    assert report["warnings"] == ["numpy 2.0rc1 must be upgraded to >=2.0"]
+    
+    assert optimizer.get_compatibility_report("2.1")["warnings"] == []
+    optimizer.add_dependency("numpy", "1.0rc1")
+    assert optimizer.get_compatibility_report("1.5")["warnings"] == []
+
+def test_dependency_upgrades_carry_along_the_path():
+    """Test a package upgraded earlier on a path is not charged again."""
+    optimizer = UpgradeOptimizer()
+    optimizer.set_current_version("A")
+    optimizer.add_dependency("numpy", "1.26.0")
+    optimizer.add_upgrade_path("A", "B", cost=1.0)
+    optimizer.add_upgrade_path("B", "D", cost=1.0)
+    optimizer.add_upgrade_path("A", "C", cost=1.5)
+    optimizer.add_upgrade_path("C", "D", cost=1.0)
+    optimizer.add_version_requirements("B", {"numpy": ">=2"})
+    optimizer.add_version_requirements("D", {"numpy": ">=2"})
+    
+    plan = optimizer.plan_upgrade("D")
+    assert plan["path"] == ["A", "B", "D"]
+    assert plan["cost"] == 3.0
+    
+    steps = optimizer.optimize("D")["recommended_steps"]
+    assert steps.count("Upgrade dependency numpy to >=2") == 1
+    
+    # An earlier upgrade can also rule out a later version's upper bound
+    optimizer.add_version_requirements("D", {"numpy": ">=1.20,<2"})
+    assert optimizer.plan_upgrade("D")["path"] == ["A", "C", "D"]
+
+def test_exclusions_move_the_minimum_above_them():
+    """Test an excluded lower bound is satisfiable by the next version up."""
+    optimizer = _graph_optimizer()
+    optimizer.add_dependency("numpy", "1.26.0")
+    optimizer.add_version_requirements("1.5", {"numpy": ">=2,!=2"})
+    
+    plan = optimizer.plan_upgrade("2.0")
+    assert plan["path"] == ["1.0", "1.5", "2.0"]
+    assert plan["steps"][0]["dependency_upgrades"] == {"numpy": ">=2,!=2"}
+    
+    # The version picked for 1.5 already meets a plain >=2 on 2.0
+    optimizer.add_version_requirements("2.0", {"numpy": ">=2"})
+    assert optimizer.plan_upgrade("2.0")["cost"] == 3.0
+    
+    optimizer.add_version_requirements("1.5", {"numpy": ">=2,<=2,!=2"})
+    assert optimizer.plan_upgrade("2.0")["path"] == ["1.0", "2.0"]
+
+def test_plan_upgrade_keeps_costlier_routes_with_other_packages():
+    """Test a dearer route is kept when the cheaper one blocks a later version."""
+    optimizer = UpgradeOptimizer()
+    optimizer.set_current_version("1.0")
+    optimizer.add_dependency("numpy", "1.5")
+    optimizer.add_upgrade_path("1.0", "1.1")
+    optimizer.add_upgrade_path("1.0", "1.2")
+    optimizer.add_upgrade_path("1.1", "2.0", cost=1.0)
+    optimizer.add_upgrade_path("1.2", "2.0", cost=2.5)
+    optimizer.add_upgrade_path("2.0", "3.0")
+    optimizer.add_version_requirements("1.1", {"numpy": ">=2.0"})
+    optimizer.add_version_requirements("3.0", {"numpy": "<2.0"})
+    
+    assert optimizer.plan_upgrade("2.0")["path"] == ["1.0", "1.1", "2.0"]
+    plan = optimizer.plan_upgrade("3.0")
+    assert plan["path"] == ["1.0", "1.2", "2.0", "3.0"]
+    assert plan["cost"] == 4.5
+    assert optimizer.optimize("3.0")["upgrade_path"] == plan["path"]
+
+def test_plan_upgrade_scales_to_large_graphs():
+    """Test planning over thousands of packages and versions stays fast."""
+    optimizer = UpgradeOptimizer()
+    optimizer.set_current_version("v0")
+    optimizer.dependencies = {f"pkg{i}": "1.0" for i in range(2000)}
+    for i in range(5000):
+        optimizer.add_upgrade_path(f"v{i}", f"v{i + 1}", cost=1.0)
+        optimizer.add_upgrade_path(f"v{i}", f"v{i + 2}", cost=1.5)
+        # Each release raises a rolling window of shared packages
+        optimizer.add_version_requirements(f"v{i + 1}", {
+            f"pkg{(i // 10 + k) % 2000}": f">={1 + i // 50}.{i % 10}" for k in range(3)
+        })
+    
+    start = time.perf_counter()
+    plan = optimizer.plan_upgrade("v5000")
+    assert time.perf_counter() - start < 5.0
+    assert plan["path"][0] == "v0" and plan["path"][-1] == "v5000"
+    upgraded = [package for step in plan["steps"] for package in step["dependency_upgrades"]]
+    assert len(upgraded) < len(plan["steps"]) * 3